@@ -0,0 +1,113 @@
+"""
+Benchmark for DataManager.calculate_stats engines.
+
+Builds a synthetic ledger in a throwaway APPDATA folder and times, per period
+(uncached, via _compute_stats):
+  - python:     the per-line loop (_aggregate_positions over every position in the period)
+  - rollups:    the default engine (daily rollups + live edge days)
+  - vectorized: pandas/NumPy over the flattened line-item table
+
+Usage: python bench_stats.py [line_items]   (default 150000)
+"""
+import os
+import sys
+import time
+import random
+import datetime
+import tempfile
+
+os.environ["APPDATA"] = tempfile.mkdtemp(prefix="pos_bench_")
+
+import pandas as pd
+import numpy as np
+import main
+
+
+def build_ledger(line_items: int, seed: int = 7):
+    rnd = random.Random(seed)
+    products = [(f"PRODUCT {i:03d}", round(rnd.uniform(5, 500), 2)) for i in range(300)]
+    start = datetime.datetime.now() - datetime.timedelta(days=365)
+    ledger, lines = [], 0
+    while lines < line_items:
+        kind = rnd.choices(["sales", "inventory", "correction"], [85, 10, 5])[0]
+        ts = start + datetime.timedelta(seconds=rnd.randint(0, 365 * 86400))
+        items = []
+        for _ in range(rnd.randint(1, 5)):
+            name, price = rnd.choice(products)
+            qty = rnd.randint(1, 6) if kind != "correction" else rnd.choice([-2, -1, 1])
+            item = {"code": "", "name": name, "price": price, "qty": qty, "category": "GENERAL"}
+            if kind == "sales":
+                item["subtotal"] = price * qty
+            items.append(item)
+        transaction = {"type": kind, "timestamp": ts.strftime("%Y-%m-%d %H:%M:%S"),
+                       "filename": f"{len(ledger)}.pdf", "items": items}
+        if kind == "correction":
+            transaction["ref_type"] = rnd.choice(["sales", "inventory"])
+            transaction["ref_filename"] = "ref.pdf"
+        ledger.append(transaction)
+        lines += len(items)
+    ledger.sort(key=lambda t: t["timestamp"])
+    return ledger, lines
+
+
+def by_price(stats):
+    """Engine-independent view: per product (in, out, {price: (in, out, amount)})."""
+    return {name: (entry['in'], entry['out'],
+                   {p: (c['in'], c['out'], round(c['sales'], 4)) for p, c in entry['prices'].items()})
+            for name, entry in stats.items()}
+
+
+def python_loop(dm, period):
+    positions = dm._positions_in_period(*period) if period else list(range(dm.ledger_length()))
+    stats, corrections = {}, []
+    counts = dm._aggregate_positions(positions, stats, corrections)
+    return stats, counts
+
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(line_items: int) -> None:
+    main.AppModules.pd = pd
+    main.AppModules.np = np
+    dm = main.DataManager(main.AppModules)
+    ledger, lines = build_ledger(line_items)
+    dm.replace_ledger(ledger)
+    print(f"{len(ledger)} transactions, {lines} line items")
+
+    dm.config["stats_engine"] = "vectorized"
+    t0 = time.perf_counter()
+    dm._compute_stats(None)
+    print(f"line-item table build (one-off, then incremental): {time.perf_counter() - t0:.3f}s\n")
+
+    now = datetime.datetime.now().replace(microsecond=0)
+    periods = {
+        "all time": None,
+        "today": (now.replace(hour=0, minute=0, second=0), now),
+        "month": (now.replace(day=1, hour=0, minute=0, second=0), now),
+        "90 days, partial edges": (now - datetime.timedelta(days=90, hours=5), now - datetime.timedelta(hours=7)),
+    }
+
+    print(f"{'period':<24}{'python':>10}{'rollups':>10}{'vectorized':>12}{'vs python':>11}{'vs rollups':>12}")
+    for label, period in periods.items():
+        t_py, (py_stats, py_counts) = timed(lambda: python_loop(dm, period))
+        dm.config["stats_engine"] = "rollups"
+        t_roll, roll = timed(lambda: dm._compute_stats(period))
+        dm.config["stats_engine"] = "vectorized"
+        t_vec, vec = timed(lambda: dm._compute_stats(period))
+
+        assert by_price(vec[0]) == by_price(roll[0]) == by_price(py_stats), label
+        assert vec[1:] == roll[1:] and vec[1:3] == py_counts, label
+        print(f"{label:<24}{t_py:>9.3f}s{t_roll:>9.3f}s{t_vec:>11.3f}s"
+              f"{t_py / t_vec:>10.1f}x{t_roll / t_vec:>11.1f}x")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 150000)
@@ -12,6 +12,14 @@ import socket
 import queue
 import secrets
 import re
+import sqlite3
+import gzip
+import bisect
+import math
+import hashlib
+import pickle
+from array import array
+from collections import OrderedDict
 from typing import Optional, List, Dict, Any, Tuple, Union, Set
 from PIL import Image, ImageTk
 from style_manager import StyleManager
@@ -22,11 +30,17 @@ from style_manager import StyleManager
 APP_DATA_DIR = os.path.join(os.environ.get("APPDATA", os.path.expanduser("~")), "MMD_POS_System")
 BACKUP_DIR = os.path.join(APP_DATA_DIR, "backups")
 
+PARTITION_DIR = os.path.join(APP_DATA_DIR, "ledger_partitions")
+EXPORT_DIR = os.path.join(APP_DATA_DIR, "export")
+
 # Ensure app data directories exist
 if not os.path.exists(APP_DATA_DIR):
     os.makedirs(APP_DATA_DIR)
 if not os.path.exists(BACKUP_DIR):
     os.makedirs(BACKUP_DIR)
+for _dir in [PARTITION_DIR, EXPORT_DIR]:
+    if not os.path.exists(_dir):
+        os.makedirs(_dir)
 
 RECEIPT_FOLDER = "receipts"
 INVENTORY_FOLDER = "inventoryreceipts"
@@ -35,7 +49,18 @@ CORRECTION_FOLDER = "correctionreceipts"
 DATA_FILE = "products.xlsx"
 CONFIG_FILE = os.path.join(APP_DATA_DIR, "config.json")
 LEDGER_FILE = os.path.join(APP_DATA_DIR, "ledger.json")
+LEDGER_JOURNAL_FILE = os.path.join(APP_DATA_DIR, "ledger.journal")
+LEDGER_DB_FILE = os.path.join(APP_DATA_DIR, "ledger.db")
+ROLLUP_FILE = os.path.join(APP_DATA_DIR, "ledger_rollups.json")
+LEDGER_EXPORT_FILE = os.path.join(EXPORT_DIR, "ledger.json")
+COMPRESSED_LEDGER_EXT = ".jsonl.gz"
+LEDGER_EXPORT_GZ_FILE = os.path.join(EXPORT_DIR, "ledger" + COMPRESSED_LEDGER_EXT)
+STOCK_CHECKPOINT_FILE = os.path.join(APP_DATA_DIR, "stock_checkpoints.json")
+CLOSED_DAYS_FILE = os.path.join(APP_DATA_DIR, "closed_days.json")
+CATALOG_CACHE_FILE = os.path.join(APP_DATA_DIR, "catalog_cache.pickle")
+BACKUP_INDEX_FILE = os.path.join(BACKUP_DIR, "backup_index.json")
 APP_TITLE = "MMD Inventory Tracker v15.0"  # Refactored Version
+SUMMARY_INSERT_CHUNK = 200  # Summary rows inserted into the Treeview per Tk event-loop turn
 
 # --- EMAIL CONFIGURATION ---
 SMTP_SERVER = "smtp.gmail.com"
@@ -54,6 +79,115 @@ def truncate_product_name(name: str) -> str:
         return name[:15] + name[-15:]
     return name
 
+_NAIVE_EPOCH = datetime.datetime(1970, 1, 1)
+
+def naive_epoch(dt: datetime.datetime) -> float:
+    """Seconds since 1970-01-01 for a naive datetime, ignoring timezone/DST so ordering matches datetime."""
+    return (dt - _NAIVE_EPOCH).total_seconds()
+
+def parse_ledger_timestamp(ts_str: Any, date_fmt: str = "%Y-%m-%d %H:%M:%S") -> Optional[datetime.datetime]:
+    """Parses a ledger timestamp, returning None when it is malformed."""
+    try:
+        # Fast path for the canonical 'YYYY-MM-DD HH:MM:SS' layout
+        if len(ts_str) == 19 and ts_str[4] == '-' and ts_str[7] == '-' and ts_str[10] == ' ' \
+                and ts_str[13] == ':' and ts_str[16] == ':' and date_fmt == "%Y-%m-%d %H:%M:%S":
+            return datetime.datetime(int(ts_str[0:4]), int(ts_str[5:7]), int(ts_str[8:10]),
+                                     int(ts_str[11:13]), int(ts_str[14:16]), int(ts_str[17:19]))
+        return datetime.datetime.strptime(ts_str, date_fmt)
+    except Exception:
+        return None
+
+def new_stats_entry(name: Any, stock_only: bool = False) -> Dict:
+    """A calculate_stats entry: stock totals plus, unless stock_only, running totals per price point."""
+    entry = {'name': name, 'in': 0, 'out': 0}
+    if not stock_only:
+        entry['prices'] = {}
+    return entry
+
+def price_cell(entry: Dict, price: float, first: Tuple) -> Dict:
+    """
+    The {'in', 'out', 'sales', 'first'} running totals of an entry at one price point.
+    'first' is the smallest seen_key() of the lines folded in, which orders price points
+    as the ledger first lists them (see ordered_prices).
+    """
+    cell = entry['prices'].get(price)
+    if cell is None:
+        cell = entry['prices'][price] = {'in': 0, 'out': 0, 'sales': 0, 'first': first}
+    elif first < cell['first']:
+        cell['first'] = first
+    return cell
+
+def seen_key(sold: bool, pos: int, line: int) -> Tuple[int, int, int]:
+    """
+    Where a line at a price point was seen: sales lines (and sales corrections) rank before
+    inventory lines, then by ledger position and line within the transaction.
+    """
+    return (0 if sold else 1, pos, line)
+
+# Price points of closed days frozen before their first-seen keys were kept sort last
+UNSEEN_KEY = (2, 0, 0)
+
+def ordered_prices(prices: Dict) -> List[Tuple[float, Dict]]:
+    """
+    An entry's price points in report order: the prices of its sales lines as first sold,
+    then the prices only received, as first received.
+    """
+    return sorted(prices.items(), key=lambda item: item[1]['first'])
+
+def format_cover(days: Optional[float]) -> str:
+    """Days of cover for display; '-' when nothing sells."""
+    return "-" if days is None else f"{days:.1f}"
+
+def sheet_cells(df) -> List[List[Any]]:
+    """Header and rows of a DataFrame as cell values, blanks (NaN, None, "") as None, for comparing sheets."""
+    values = df.astype(object).where(df.notna(), None).values.tolist()
+    return [list(df.columns)] + [[None if v == "" else v for v in row] for row in values]
+
+def is_compressed_ledger(path: str) -> bool:
+    return path.lower().endswith(".gz")
+
+def write_ledger_jsonl(path: str, transactions, meta: Optional[Dict] = None) -> None:
+    """
+    Writes transactions as gzip-framed JSON lines, one transaction per line, atomically
+    and fsynced. An optional first line {"ledger_meta": {...}} carries the metadata.
+    """
+    temp_file = path + ".tmp"
+    with open(temp_file, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6) as f:
+            if meta is not None:
+                f.write((json.dumps({"ledger_meta": meta}) + "\n").encode('utf-8'))
+            for transaction in transactions:
+                f.write((json.dumps(transaction) + "\n").encode('utf-8'))
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(temp_file, path)
+
+def iter_ledger_file(path: str, meta: Optional[Dict] = None):
+    """
+    Yields the transactions of a ledger file. Compressed JSON lines are decoded one
+    line at a time; plain JSON (a list, or a dict with "transactions") is parsed whole.
+    Everything besides the transactions is copied into meta when given.
+    """
+    if is_compressed_ledger(path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip(): continue
+                record = json.loads(line)
+                if "ledger_meta" in record and len(record) == 1:
+                    if meta is not None:
+                        meta.update(record["ledger_meta"])
+                    continue
+                yield record
+        return
+
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        if meta is not None:
+            meta.update({k: v for k, v in data.items() if k != "transactions"})
+        data = data.get("transactions", [])
+    yield from data
+
 # --- DEPENDENCY CONTAINER ---
 class AppModules:
     """
@@ -61,6 +195,7 @@ class AppModules:
     and organized access without global pollution.
     """
     pd: Any = None
+    np: Any = None
     canvas: Any = None
     letter: Any = None
     inch: Any = None
@@ -92,35 +227,1072 @@ class TransactionItem(Dict):
     subtotal: Optional[float]
     # ... other fields allow dynamic keys
 
+# --- LEDGER STORAGE ---
+class ColumnarLedger:
+    """
+    Column-wise in-memory ledger. Transaction headers and line items live in typed
+    arrays; product names, categories, codes and types are interned in one string
+    table. Indexing and iteration yield plain transaction dicts (same keys, same key
+    order), so existing callers are unaffected, while aggregation loops read the
+    columns through get() and lines(). Anything that does not fit the columns
+    (unknown keys, unexpected value types) is kept verbatim as its original dict.
+    """
+    # key -> kind: "sym" (interned str), "text" (str), "float", "int"
+    TXN_COLUMNS = {"type": "sym", "timestamp": "text", "filename": "text",
+                   "ref_type": "sym", "ref_filename": "text"}
+    ITEM_COLUMNS = {"code": "sym", "name": "sym", "category": "sym", "price": "float",
+                    "qty": "int", "subtotal": "float", "new_stock": "int", "adjustment": "int"}
+    _KIND_TYPES = {"sym": str, "text": str, "float": float, "int": int}
+
+    def __init__(self, transactions=()):
+        self.strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self._layouts: List[Tuple[str, ...]] = []
+        self._layout_sets: List[frozenset] = []
+        self._layout_ids: Dict[Tuple[str, ...], int] = {}
+
+        self.t_layout = array('l')  # -1 marks a transaction kept verbatim in _raw_txns
+        self.t_cols = {key: self._new_column(kind) for key, kind in self.TXN_COLUMNS.items()}
+        self.item_start = array('l', [0])
+        self.t_raw_items = array('b')  # 1 when some of the transaction's items are kept verbatim
+        self.i_layout = array('l')  # -1 marks an item kept verbatim in _raw_items
+        self.i_cols = {key: self._new_column(kind) for key, kind in self.ITEM_COLUMNS.items()}
+        self._raw_txns: Dict[int, Any] = {}
+        self._raw_items: Dict[int, Any] = {}
+        self._bind_line_cols()
+
+        self.extend(transactions)
+
+    def _bind_line_cols(self) -> None:
+        self._line_cols = (self.strings, self.i_cols["name"], self.i_cols["qty"],
+                           self.i_cols["price"], self.i_cols["subtotal"])
+
+    @staticmethod
+    def _new_column(kind: str):
+        if kind == "text": return []
+        if kind == "float": return array('d')
+        return array('q')  # "int" values and "sym" string ids
+
+    def _intern(self, value: str) -> int:
+        sid = self._string_ids.get(value)
+        if sid is None:
+            sid = self._string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return sid
+
+    def _layout(self, keys: Tuple[str, ...]) -> int:
+        lid = self._layout_ids.get(keys)
+        if lid is None:
+            lid = self._layout_ids[keys] = len(self._layouts)
+            self._layouts.append(keys)
+            self._layout_sets.append(frozenset(keys))
+        return lid
+
+    def _fits(self, record: Any, columns: Dict[str, str], extra: str = None) -> bool:
+        if type(record) is not dict:
+            return False
+        for key, value in record.items():
+            if key == extra:
+                if type(value) is not list: return False
+                continue
+            kind = columns.get(key)
+            if kind is None or type(value) is not self._KIND_TYPES[kind]:
+                return False
+            if kind == "int" and not -2 ** 63 <= value < 2 ** 63:
+                return False
+        return True
+
+    def _push(self, record: Dict, columns: Dict[str, str], cols: Dict) -> int:
+        # Absent keys store calculate_stats' defaults, so lines() can read columns without checking the layout
+        keys = tuple(record)
+        for key, kind in columns.items():
+            value = record.get(key)
+            if kind == "text":
+                cols[key].append(value)
+            elif kind == "sym":
+                if value is None and key == "name":
+                    value = 'Unknown'
+                cols[key].append(self._intern(value) if value is not None else -1)
+            else:
+                cols[key].append(value if value is not None else 0)
+        return self._layout(keys)
+
+    def _push_placeholder(self, columns: Dict[str, str], cols: Dict) -> None:
+        for key, kind in columns.items():
+            cols[key].append(None if kind == "text" else (-1 if kind == "sym" else 0))
+
+    def append(self, transaction: Any) -> None:
+        idx = len(self.t_layout)
+        if self._fits(transaction, self.TXN_COLUMNS, "items") and \
+                all(self._fits(item, self.ITEM_COLUMNS) or type(item) is dict for item in transaction.get("items", [])):
+            self.t_layout.append(self._push(transaction, self.TXN_COLUMNS, self.t_cols))
+            has_raw = 0
+            for item in transaction.get("items", []):
+                if self._fits(item, self.ITEM_COLUMNS):
+                    self.i_layout.append(self._push(item, self.ITEM_COLUMNS, self.i_cols))
+                else:
+                    self._raw_items[len(self.i_layout)] = item
+                    self.i_layout.append(-1)
+                    self._push_placeholder(self.ITEM_COLUMNS, self.i_cols)
+                    has_raw = 1
+            self.t_raw_items.append(has_raw)
+        else:
+            self._raw_txns[idx] = transaction
+            self.t_layout.append(-1)
+            self.t_raw_items.append(0)
+            self._push_placeholder(self.TXN_COLUMNS, self.t_cols)
+        self.item_start.append(len(self.i_layout))
+
+    def extend(self, transactions) -> None:
+        for transaction in transactions:
+            self.append(transaction)
+
+    def copy(self) -> 'ColumnarLedger':
+        """Cheap snapshot (column copies) for readers on other threads."""
+        clone = ColumnarLedger()
+        clone.strings = list(self.strings)
+        clone._string_ids = dict(self._string_ids)
+        clone._layouts = list(self._layouts)
+        clone._layout_sets = list(self._layout_sets)
+        clone._layout_ids = dict(self._layout_ids)
+        clone.t_layout = self.t_layout[:]
+        clone.t_cols = {key: col[:] for key, col in self.t_cols.items()}
+        clone.item_start = self.item_start[:]
+        clone.t_raw_items = self.t_raw_items[:]
+        clone.i_layout = self.i_layout[:]
+        clone.i_cols = {key: col[:] for key, col in self.i_cols.items()}
+        clone._raw_txns = dict(self._raw_txns)
+        clone._raw_items = dict(self._raw_items)
+        clone._bind_line_cols()
+        return clone
+
+    def _value(self, cols: Dict, columns: Dict[str, str], key: str, idx: int):
+        value = cols[key][idx]
+        return self.strings[value] if columns[key] == "sym" else value
+
+    def _item(self, j: int) -> Dict:
+        lid = self.i_layout[j]
+        if lid < 0:
+            return self._raw_items[j]
+        return {key: self._value(self.i_cols, self.ITEM_COLUMNS, key, j) for key in self._layouts[lid]}
+
+    def _transaction(self, idx: int) -> Dict:
+        lid = self.t_layout[idx]
+        if lid < 0:
+            return self._raw_txns[idx]
+        transaction = {}
+        for key in self._layouts[lid]:
+            if key == "items":
+                transaction[key] = [self._item(j) for j in range(self.item_start[idx], self.item_start[idx + 1])]
+            else:
+                transaction[key] = self._value(self.t_cols, self.TXN_COLUMNS, key, idx)
+        return transaction
+
+    def get(self, idx: int, key: str, default=None):
+        """transaction.get(key, default) without building the transaction dict."""
+        lid = self.t_layout[idx]
+        if lid < 0:
+            return self._raw_txns[idx].get(key, default)
+        if key not in self._layout_sets[lid]:
+            return default
+        value = self.t_cols[key][idx]
+        return self.strings[value] if self.TXN_COLUMNS[key] == "sym" else value
+
+    def types(self, idx: int) -> Tuple[Optional[str], Optional[str]]:
+        """(type, ref_type) of a transaction in one lookup."""
+        lid = self.t_layout[idx]
+        if lid < 0:
+            raw = self._raw_txns[idx]
+            return raw.get('type'), raw.get('ref_type')
+        keys, strings = self._layout_sets[lid], self.strings
+        return (strings[self.t_cols["type"][idx]] if "type" in keys else None,
+                strings[self.t_cols["ref_type"][idx]] if "ref_type" in keys else None)
+
+    def row(self, idx: int) -> Tuple[Optional[str], Optional[str], Any]:
+        """(type, ref_type, lines(idx)) in one call, for aggregation loops."""
+        if self.t_layout[idx] < 0 or self.t_raw_items[idx]:
+            t_type, ref_type = self.types(idx)
+            return t_type, ref_type, self._raw_lines(idx)
+        strings, names, qtys, prices, subtotals = self._line_cols
+        tid, rid = self.t_cols["type"][idx], self.t_cols["ref_type"][idx]
+        return (strings[tid] if tid >= 0 else None,
+                strings[rid] if rid >= 0 else None,
+                [(strings[names[j]], qtys[j], prices[j], subtotals[j])
+                 for j in range(self.item_start[idx], self.item_start[idx + 1])])
+
+    def lines(self, idx: int):
+        """
+        (name, qty, price, subtotal) per line item, converted exactly as calculate_stats
+        does; for verbatim items a bad line raises at the same point it would there.
+        """
+        if self.t_layout[idx] < 0 or self.t_raw_items[idx]:
+            return self._raw_lines(idx)
+
+        strings, names, qtys, prices, subtotals = self._line_cols
+        return [(strings[names[j]], qtys[j], prices[j], subtotals[j])
+                for j in range(self.item_start[idx], self.item_start[idx + 1])]
+
+    def _raw_lines(self, idx: int):
+        if self.t_layout[idx] < 0:
+            items = self._raw_txns[idx].get('items', [])
+        else:
+            items = (self._item(j) for j in range(self.item_start[idx], self.item_start[idx + 1]))
+        for item in items:
+            name = item.get('name', 'Unknown')
+            qty = int(item.get('qty', 0))
+            price = float(item.get('price', 0))
+            yield name, qty, price, item.get('subtotal', 0)
+
+    def __len__(self) -> int:
+        return len(self.t_layout)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._transaction(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ledger index out of range")
+        return self._transaction(index)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self._transaction(idx)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __add__(self, other) -> List[Dict]:
+        return list(self) + list(other)
+
+    def __radd__(self, other) -> List[Dict]:
+        return list(other) + list(self)
+
+
+class LineItemTable:
+    """
+    The ledger flattened into one row per line item (typed arrays, appended
+    incrementally), for vectorized aggregation with pandas/NumPy.
+    Rows mirror the calculate_stats loop exactly: a line that would raise there
+    ends its transaction's rows at the same point.
+    """
+    # Transaction kinds
+    SKIP, INVENTORY, SALES, CORRECTION, OTHER = 0, 1, 2, 3, 4
+    # Line kinds: counted as stock in, as stock out (with a sales amount), or only listed
+    LINE_NONE, LINE_IN, LINE_OUT = 0, 1, 2
+    INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+    def __init__(self, ledger: ColumnarLedger):
+        self.ledger = ledger
+        self.count = 0  # Transactions flattened so far
+        self.exact = True  # False once a quantity does not fit int64; callers then use the Python path
+        self.t_kind = array('b')
+        self.correction_idx: List[int] = []  # Ledger indices of corrections, ascending
+        self.correction_files: List[str] = []
+        self.names: List[Any] = []
+        self._name_ids: Dict[Any, int] = {}
+        self.l_txn = array('q')
+        self.l_name = array('q')
+        self.l_kind = array('b')
+        self.l_qty = array('q')
+        self.l_price = array('d')
+        self.l_amt = array('d')
+
+    def sync(self) -> None:
+        """Flattens transactions appended to the ledger since the last call."""
+        ledger = self.ledger
+        for idx in range(self.count, len(ledger)):
+            self._flatten(idx)
+        self.count = len(ledger)
+
+    def _name_id(self, name: Any) -> int:
+        nid = self._name_ids.get(name)
+        if nid is None:
+            nid = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return nid
+
+    def _push(self, idx: int, nid: int, kind: int, qty: int, price: float, amt: float) -> None:
+        self.l_txn.append(idx)
+        self.l_name.append(nid)
+        self.l_kind.append(kind)
+        self.l_qty.append(qty)
+        self.l_price.append(price)
+        self.l_amt.append(amt)
+
+    def _flatten(self, idx: int) -> None:
+        ledger = self.ledger
+        try:
+            t_type, ref_type, lines = ledger.row(idx)
+        except Exception:
+            self.t_kind.append(self.SKIP)
+            return
+        if not t_type:
+            self.t_kind.append(self.SKIP)
+            return
+
+        kind = {'inventory': self.INVENTORY, 'sales': self.SALES, 'correction': self.CORRECTION}.get(t_type, self.OTHER)
+        self.t_kind.append(kind)
+        if kind == self.CORRECTION:
+            self.correction_idx.append(idx)
+            self.correction_files.append(ledger.get(idx, 'filename', 'Unknown'))
+            line_kind = {'sales': self.LINE_OUT, 'inventory': self.LINE_IN}.get(ref_type, self.LINE_NONE)
+        else:
+            line_kind = {self.SALES: self.LINE_OUT, self.INVENTORY: self.LINE_IN}.get(kind, self.LINE_NONE)
+
+        try:
+            for name, qty, price, subtotal in lines:
+                nid = self._name_id(name)
+                if not self.INT64_MIN <= qty <= self.INT64_MAX:
+                    self.exact = False
+                    raise OverflowError(qty)
+                if line_kind == self.LINE_OUT:
+                    try:
+                        amt = float(subtotal) if kind == self.SALES else qty * price
+                    except Exception:
+                        self._push(idx, nid, self.LINE_NONE, 0, price, 0.0)  # Listed before the failure
+                        raise
+                else:
+                    amt = 0.0
+                self._push(idx, nid, line_kind, qty, price, amt)
+        except Exception:
+            pass  # Rest of this transaction is skipped, as in calculate_stats
+
+    def aggregate(self, pd, np, selected, stock_only: bool = False, base: int = 0) -> Tuple[Dict, int, int, List[str]]:
+        """
+        calculate_stats result for the transactions where the boolean array `selected`
+        (one entry per ledger index) is set; `base` is the ledger position of index 0.
+        """
+        t_kind = np.frombuffer(self.t_kind, dtype=np.int8) if self.count else np.zeros(0, np.int8)
+        in_count = int(np.count_nonzero(selected & (t_kind == self.INVENTORY)))
+        out_count = int(np.count_nonzero(selected & (t_kind == self.SALES)))
+        corrections = []
+        if self.correction_idx:
+            hits = np.flatnonzero(selected[np.array(self.correction_idx, dtype=np.int64)])
+            corrections = [self.correction_files[i] for i in hits]
+
+        def column(values, dtype):
+            return np.frombuffer(values, dtype=dtype) if len(values) else np.zeros(0, dtype)
+
+        l_txn = column(self.l_txn, np.int64)
+        l_sel = selected[l_txn]
+        frame = pd.DataFrame({
+            "row": np.flatnonzero(l_sel),
+            "name": column(self.l_name, np.int64)[l_sel],
+            "kind": column(self.l_kind, np.int8)[l_sel],
+            "qty": column(self.l_qty, np.int64)[l_sel],
+            "price": column(self.l_price, np.float64)[l_sel],
+            "amt": column(self.l_amt, np.float64)[l_sel],
+        })
+
+        stats = {}
+        for nid in pd.unique(frame["name"]):
+            name = self.names[nid]
+            stats[name] = new_stats_entry(name, stock_only)
+
+        counted = frame[frame["kind"] != self.LINE_NONE]
+        if stock_only:
+            grouped = counted.groupby(["name", "kind"], sort=False)["qty"].sum()
+            for (nid, kind), qty in grouped.items():
+                stats[self.names[nid]]['out' if kind == self.LINE_OUT else 'in'] += int(qty)
+            return stats, in_count, out_count, corrections
+
+        grouped = counted.groupby(["name", "kind", "price"], sort=False, dropna=False).agg(
+            qty=("qty", "sum"), amt=("amt", "sum"), row=("row", "min"))
+        for (nid, kind, price), qty, amt, row in zip(grouped.index, grouped["qty"], grouped["amt"], grouped["row"]):
+            entry = stats[self.names[nid]]
+            # Rows run in ledger and line order, so the first row also orders lines within a transaction
+            cell = price_cell(entry, float(price), seen_key(kind == self.LINE_OUT, int(l_txn[row]) + base, int(row)))
+            if kind == self.LINE_OUT:
+                entry['out'] += int(qty)
+                cell['out'] += int(qty)
+                cell['sales'] += float(amt)
+            else:
+                entry['in'] += int(qty)
+                cell['in'] += int(qty)
+
+        return stats, in_count, out_count, corrections
+
+class LedgerPartitions:
+    """
+    Month-partitioned on-disk layout of the JSON ledger.
+    Partitions are contiguous runs of the ledger in append order, keyed by month
+    (a back-dated entry stays in the newest partition so order never changes).
+    The manifest records each partition's size, time range and last entry so cold
+    partitions can be skipped until a query actually reaches them.
+    """
+    MANIFEST_NAME = "manifest.json"
+
+    def __init__(self, directory: str, date_fmt: str = "%Y-%m-%d %H:%M:%S"):
+        self.directory = directory
+        self.date_fmt = date_fmt
+        self.manifest_path = os.path.join(directory, self.MANIFEST_NAME)
+        self.parts: List[Dict] = []
+        self.dirty: Dict[int, int] = {}  # Partition index -> change version; cleared only by the write that saw it
+        self._stale_files: Set[str] = set()
+        self._version = 0
+        self._lock = threading.Lock()  # Guards parts/dirty against a write-behind thread
+        self.compressed = False  # Write partitions as gzip JSON lines; either format is readable
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def load_manifest(self) -> None:
+        with open(self.manifest_path, 'r') as f:
+            self.parts = json.load(f).get("partitions", [])
+        self.dirty = {}
+
+    def total(self) -> int:
+        return sum(p["count"] for p in self.parts)
+
+    def offset(self, idx: int) -> int:
+        """Global ledger position of the first transaction in partition idx."""
+        return sum(p["count"] for p in self.parts[:idx])
+
+    def index_of_position(self, pos: int) -> int:
+        start = 0
+        for idx, part in enumerate(self.parts):
+            if pos < start + part["count"]:
+                return idx
+            start += part["count"]
+        return len(self.parts) - 1
+
+    def read(self, idx: int):
+        """Streams the transactions of partition idx."""
+        return iter_ledger_file(os.path.join(self.directory, self.parts[idx]["file"]))
+
+    def _file_name(self, month: str) -> str:
+        return f"ledger-{month}" + (COMPRESSED_LEDGER_EXT if self.compressed else ".json")
+
+    def _new_part(self, month: str) -> Dict:
+        return {"month": month, "file": self._file_name(month), "count": 0,
+                "min_epoch": None, "max_epoch": None, "malformed": 0, "last": None}
+
+    def _note(self, part: Dict, transaction: Dict) -> None:
+        part["count"] += 1
+        dt = parse_ledger_timestamp(transaction.get('timestamp'), self.date_fmt)
+        if dt is None:
+            part["malformed"] += 1
+        else:
+            epoch = naive_epoch(dt)
+            if part["min_epoch"] is None or epoch < part["min_epoch"]: part["min_epoch"] = epoch
+            if part["max_epoch"] is None or epoch > part["max_epoch"]: part["max_epoch"] = epoch
+        part["last"] = [transaction.get('timestamp'), transaction.get('filename')]
+
+    def recount(self, idx: int, transactions) -> None:
+        """Recomputes partition idx's size, time range and last entry from its transactions."""
+        with self._lock:
+            part = self.parts[idx]
+            part.update(count=0, min_epoch=None, max_epoch=None, malformed=0, last=None)
+            for transaction in transactions:
+                self._note(part, transaction)
+
+    def note_append(self, transaction: Dict) -> None:
+        """Assigns an appended transaction to the newest partition, opening a new month if needed."""
+        dt = parse_ledger_timestamp(transaction.get('timestamp'), self.date_fmt)
+        month = dt.strftime("%Y-%m") if dt else ""
+        with self._lock:
+            if not self.parts or month > self.parts[-1]["month"]:
+                self.parts.append(self._new_part(month or datetime.datetime.now().strftime("%Y-%m")))
+            self._note(self.parts[-1], transaction)
+            self._mark_dirty(len(self.parts) - 1)
+
+    def _mark_dirty(self, idx: int) -> None:
+        self._version += 1
+        self.dirty[idx] = self._version
+
+    def mark_dirty(self, idx: int) -> None:
+        with self._lock:
+            self._mark_dirty(idx)
+
+    def reset(self, transactions: List[Dict]) -> None:
+        """Re-partitions a whole history; every partition becomes dirty."""
+        with self._lock:
+            self._stale_files |= {p["file"] for p in self.parts}
+            self.parts = []
+            self.dirty = {}
+        for transaction in transactions:
+            self.note_append(transaction)
+
+    def overlapping(self, lo_epoch: float, hi_epoch: float) -> List[int]:
+        return [idx for idx, p in enumerate(self.parts)
+                if p["min_epoch"] is not None and p["min_epoch"] <= hi_epoch and p["max_epoch"] >= lo_epoch]
+
+    def with_malformed(self) -> List[int]:
+        return [idx for idx, p in enumerate(self.parts) if p["malformed"]]
+
+    def capture(self) -> Dict:
+        """
+        Snapshot of what the next write must persist (manifest copy, dirty versions,
+        stale files), so the write itself can run on another thread.
+        """
+        with self._lock:
+            for idx in self.dirty:
+                part = self.parts[idx]
+                if part["file"] != self._file_name(part["month"]):
+                    # Format setting changed: rewrite under the new name, drop the old file afterwards
+                    self._stale_files.add(part["file"])
+                    part["file"] = self._file_name(part["month"])
+            return {"parts": [dict(p) for p in self.parts], "dirty": dict(self.dirty),
+                    "stale": set(self._stale_files)}
+
+    def write_captured(self, state: Dict, ledger, ledger_base: int) -> None:
+        """Writes captured dirty partitions (from the loaded ledger suffix) and then the manifest."""
+        parts = state["parts"]
+        for idx in sorted(state["dirty"]):
+            part = parts[idx]
+            start = sum(p["count"] for p in parts[:idx]) - ledger_base
+            rows = ledger[start:start + part["count"]]
+            path = os.path.join(self.directory, part["file"])
+            if is_compressed_ledger(path):
+                write_ledger_jsonl(path, rows)
+                continue
+            temp_file = path + ".tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(rows, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, path)
+
+        temp_file = self.manifest_path + ".tmp"
+        with open(temp_file, 'w') as f:
+            json.dump({"partitions": parts}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.manifest_path)
+
+        live = {p["file"] for p in parts}
+        for name in state["stale"] - live:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+        with self._lock:
+            # Partitions changed again since the capture stay dirty
+            for idx, version in state["dirty"].items():
+                if self.dirty.get(idx) == version:
+                    del self.dirty[idx]
+            self._stale_files -= state["stale"]
+
+    def write(self, ledger, ledger_base: int) -> None:
+        self.write_captured(self.capture(), ledger, ledger_base)
+
+class SQLiteLedgerStore:
+    """
+    Optional ledger backend built on the stdlib sqlite3 module.
+    Transactions and line items live in indexed tables so period summaries and
+    correction lookups are answered by SQL instead of scanning the full history.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY,
+            type TEXT,
+            timestamp TEXT,
+            ts_epoch REAL,
+            filename TEXT,
+            ref_type TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS line_items (
+            id INTEGER PRIMARY KEY,
+            txn_id INTEGER NOT NULL REFERENCES transactions(id) ON DELETE CASCADE,
+            pos INTEGER NOT NULL,
+            name TEXT,
+            category TEXT,
+            price REAL,
+            qty INTEGER,
+            subtotal REAL,
+            valid INTEGER NOT NULL DEFAULT 1,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_transactions_timestamp ON transactions(timestamp);
+        CREATE INDEX IF NOT EXISTS idx_transactions_epoch ON transactions(ts_epoch);
+        CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions(type, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_transactions_filename ON transactions(filename);
+        CREATE INDEX IF NOT EXISTS idx_line_items_txn ON line_items(txn_id, pos);
+        CREATE INDEX IF NOT EXISTS idx_line_items_name ON line_items(name);
+    """
+
+    def __init__(self, path: str, date_fmt: str = "%Y-%m-%d %H:%M:%S"):
+        self.path = path
+        self.date_fmt = date_fmt
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(self.SCHEMA)
+        self._add_valid_column()
+        self.conn.commit()
+
+    def _add_valid_column(self) -> None:
+        """Adds line_items.valid to databases created before it, flagging their existing lines."""
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(line_items)")]
+        if "valid" in columns:
+            return
+        self.conn.execute("ALTER TABLE line_items ADD COLUMN valid INTEGER NOT NULL DEFAULT 1")
+        invalid, current, ok = [], None, True
+        for line_id, txn_id, t_type, data in self.conn.execute(
+                "SELECT li.id, li.txn_id, t.type, li.data FROM line_items li "
+                "JOIN transactions t ON t.id = li.txn_id ORDER BY li.txn_id, li.pos"):
+            if txn_id != current:
+                current, ok = txn_id, True
+            ok = ok and self._line_ok(t_type, json.loads(data))
+            if not ok:
+                invalid.append((line_id,))
+        self.conn.executemany("UPDATE line_items SET valid = 0 WHERE id = ?", invalid)
+
+    @staticmethod
+    def _line_ok(t_type: Optional[str], item: Any) -> bool:
+        """Whether calculate_stats can convert a line item; its first bad line drops the rest of the transaction."""
+        try:
+            item.get('name', 'Unknown')
+            int(item.get('qty', 0))
+            float(item.get('price', 0))
+            if t_type == 'sales':
+                float(item.get('subtotal', 0))
+            return True
+        except Exception:
+            return False
+
+    # --- Meta ---
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        try:
+            return json.loads(row[0])
+        except Exception:
+            return default
+
+    def set_meta(self, values: Dict[str, Any]) -> None:
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                  [(k, json.dumps(v)) for k, v in values.items()])
+
+    # --- Writes ---
+    def _insert(self, transaction: Dict) -> None:
+        ts_str = transaction.get('timestamp')
+        dt = parse_ledger_timestamp(ts_str, self.date_fmt)
+        ts_epoch = naive_epoch(dt) if dt else None  # Malformed timestamps are treated as "now" at query time
+
+        header = {k: v for k, v in transaction.items() if k != 'items'}
+        cur = self.conn.execute(
+            "INSERT INTO transactions (type, timestamp, ts_epoch, filename, ref_type, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (transaction.get('type'), ts_str if isinstance(ts_str, str) else None, ts_epoch,
+             transaction.get('filename'), transaction.get('ref_type'), json.dumps(header)))
+        txn_id = cur.lastrowid
+
+        rows = []
+        ok = True  # Lines from the first unconvertible one on are stored but not aggregated
+        for pos, item in enumerate(transaction.get('items', [])):
+            ok = ok and self._line_ok(transaction.get('type'), item)
+            try:
+                qty = int(item.get('qty', 0))
+            except Exception:
+                qty = 0
+            try:
+                price = float(item.get('price', 0))
+            except Exception:
+                price = 0.0
+            try:
+                subtotal = float(item.get('subtotal', 0))
+            except Exception:
+                subtotal = 0.0
+            rows.append((txn_id, pos, item.get('name', 'Unknown'), item.get('category'),
+                         price, qty, subtotal, int(ok), json.dumps(item)))
+        self.conn.executemany(
+            "INSERT INTO line_items (txn_id, pos, name, category, price, qty, subtotal, valid, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def append(self, transaction: Dict) -> None:
+        with self._lock, self.conn:
+            self._insert(transaction)
+
+    def replace_all(self, transactions: List[Dict]) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM line_items")
+            self.conn.execute("DELETE FROM transactions")
+            for transaction in transactions:
+                self._insert(transaction)
+
+    def migrate_from_json(self, path: str) -> int:
+        """
+        One-shot import of a ledger.json file or a Backup (.json / .jsonl.gz) export.
+        Returns the number of transactions imported.
+        """
+        data: Dict = {}
+        transactions = list(iter_ledger_file(path, data))
+
+        meta = {}
+        if data:
+            meta = {
+                "summary_count": data.get("summary_count", 0),
+                "shortcuts_asked": data.get("shortcuts_asked", False),
+                "product_history": data.get("product_history", [])
+            }
+
+        self.replace_all(transactions)
+        meta["migrated_from"] = path
+        self.set_meta(meta)
+        return len(transactions)
+
+    # --- Reads ---
+    def _rebuild(self, rows: List[Tuple]) -> List[Dict]:
+        transactions = []
+        by_id = {}
+        for txn_id, data in rows:
+            transaction = json.loads(data)
+            transaction['items'] = []
+            by_id[txn_id] = transaction
+            transactions.append(transaction)
+
+        if by_id:
+            ids = list(by_id.keys())
+            # Stay well below SQLITE_MAX_VARIABLE_NUMBER
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for txn_id, data in self.conn.execute(
+                        f"SELECT txn_id, data FROM line_items WHERE txn_id IN ({marks}) ORDER BY txn_id, pos", chunk):
+                    by_id[txn_id]['items'].append(json.loads(data))
+        return transactions
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def load_transactions(self) -> List[Dict]:
+        with self._lock:
+            rows = self.conn.execute("SELECT id, data FROM transactions ORDER BY id").fetchall()
+            return self._rebuild(rows)
+
+    def transactions_for_day(self, t_type: str, day_str: str) -> List[Dict]:
+        """Transactions of a type whose timestamp starts with 'YYYY-MM-DD'."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, data FROM transactions WHERE type = ? AND timestamp >= ? AND timestamp < ? ORDER BY id",
+                (t_type, day_str, day_str + "~")).fetchall()
+            return self._rebuild(rows)
+
+    def _period_clause(self, period_filter) -> Tuple[str, List]:
+        if not period_filter:
+            return "", []
+        s, e = period_filter
+        now = datetime.datetime.now()
+        if s <= now <= e:
+            return " AND (t.ts_epoch BETWEEN ? AND ? OR t.ts_epoch IS NULL)", [naive_epoch(s), naive_epoch(e)]
+        return " AND t.ts_epoch BETWEEN ? AND ?", [naive_epoch(s), naive_epoch(e)]
+
+    # Per product (and price) aggregates over `line_items li JOIN transactions t`
+    ITEM_AGGREGATES = """
+        SUM(CASE WHEN t.type = 'inventory' OR (t.type = 'correction' AND t.ref_type = 'inventory')
+                 THEN li.qty ELSE 0 END),
+        SUM(CASE WHEN t.type = 'sales' OR (t.type = 'correction' AND t.ref_type = 'sales')
+                 THEN li.qty ELSE 0 END),
+        SUM(CASE WHEN t.type = 'sales' THEN li.subtotal
+                 WHEN t.type = 'correction' AND t.ref_type = 'sales' THEN li.qty * li.price
+                 ELSE 0 END),
+        MIN(CASE WHEN t.type = 'inventory' OR (t.type = 'correction' AND t.ref_type = 'inventory')
+                 THEN li.id END),
+        MIN(CASE WHEN t.type = 'sales' OR (t.type = 'correction' AND t.ref_type = 'sales')
+                 THEN li.id END)"""
+
+    @staticmethod
+    def _add_item_row(stats: Dict, row: Tuple, stock_only: bool) -> None:
+        """Folds one aggregate row in; the first inventory/sales line ids (or NULL) give the first-seen key."""
+        name, price, qty_in, qty_out, amt, first_in, first_sale = row
+        if name not in stats:
+            stats[name] = new_stats_entry(name, stock_only)
+        entry = stats[name]
+        entry['in'] += qty_in
+        entry['out'] += qty_out
+        if not stock_only and (first_in is not None or first_sale is not None):
+            # Line ids increase in ledger and line order
+            sold = first_sale is not None
+            cell = price_cell(entry, price, seen_key(sold, first_sale if sold else first_in, 0))
+            cell['in'] += qty_in
+            cell['out'] += qty_out
+            cell['sales'] += amt
+
+    def calculate_stats(self, period_filter: Optional[Tuple[datetime.datetime, datetime.datetime]],
+                        stock_only: bool = False) -> Tuple[Dict, int, int, List[str]]:
+        """Same contract as DataManager.calculate_stats, aggregated per product (and price) in SQL."""
+        clause, params = self._period_clause(period_filter)
+        valid = "t.type IS NOT NULL AND t.type != ''"
+
+        with self._lock:
+            counts = dict(self.conn.execute(
+                f"SELECT t.type, COUNT(*) FROM transactions t WHERE {valid}{clause} GROUP BY t.type",
+                params).fetchall())
+
+            corrections = []
+            if period_filter:
+                corrections = [r[0] if r[0] is not None else 'Unknown' for r in self.conn.execute(
+                    f"SELECT t.filename FROM transactions t WHERE t.type = 'correction'{clause} ORDER BY t.id",
+                    params)]
+
+            price_col, group_by = ("NULL", "li.name") if stock_only else ("li.price", "li.name, li.price")
+            rows = self.conn.execute(f"""
+                SELECT li.name, {price_col},{self.ITEM_AGGREGATES}
+                FROM line_items li JOIN transactions t ON t.id = li.txn_id
+                WHERE {valid} AND li.valid = 1{clause}
+                GROUP BY {group_by}
+            """, params).fetchall()
+
+        stats = {}
+        for row in rows:
+            self._add_item_row(stats, row, stock_only)
+
+        return stats, counts.get('inventory', 0), counts.get('sales', 0), corrections
+
+    def correction_positions(self, period_filter: Tuple[datetime.datetime, datetime.datetime]) \
+            -> List[Tuple[int, str]]:
+        """(transaction id, filename) of the corrections in a period, in ledger order."""
+        clause, params = self._period_clause(period_filter)
+        with self._lock:
+            return [(txn_id, fname if fname is not None else 'Unknown') for txn_id, fname in self.conn.execute(
+                f"SELECT t.id, t.filename FROM transactions t WHERE t.type = 'correction'{clause} ORDER BY t.id",
+                params)]
+
+    def calculate_stats_multi(self, intervals: List[Tuple[datetime.datetime, datetime.datetime]],
+                              stock_only: bool = False) -> List[Tuple[Dict, int, int, List[str]]]:
+        """calculate_stats for each interval, with transactions joined to their intervals in one grouped query each."""
+        results = [({}, 0, 0, []) for _ in intervals]
+        if not intervals:
+            return results
+
+        now = datetime.datetime.now()
+        values = ", ".join("(?, ?, ?, ?)" for _ in intervals)
+        params = []
+        for i, (s, e) in enumerate(intervals):
+            params += [i, naive_epoch(s), naive_epoch(e), int(s <= now <= e)]
+        cte = f"WITH iv(i, lo, hi, now_inside) AS (VALUES {values})"
+        join = "JOIN iv ON (t.ts_epoch BETWEEN iv.lo AND iv.hi OR (t.ts_epoch IS NULL AND iv.now_inside))"
+        span = " AND (t.ts_epoch BETWEEN ? AND ? OR t.ts_epoch IS NULL)"
+        params += [min(naive_epoch(s) for s, _ in intervals), max(naive_epoch(e) for _, e in intervals)]
+        valid = "t.type IS NOT NULL AND t.type != ''"
+
+        with self._lock:
+            counts = [{} for _ in intervals]
+            for i, t_type, count in self.conn.execute(
+                    f"{cte} SELECT iv.i, t.type, COUNT(*) FROM transactions t {join} "
+                    f"WHERE {valid}{span} GROUP BY iv.i, t.type", params):
+                counts[i][t_type] = count
+
+            corrections = [[] for _ in intervals]
+            for i, fname in self.conn.execute(
+                    f"{cte} SELECT iv.i, t.filename FROM transactions t {join} "
+                    f"WHERE t.type = 'correction'{span} ORDER BY t.id", params):
+                corrections[i].append(fname if fname is not None else 'Unknown')
+
+            price_col, group_by = ("NULL", "li.name") if stock_only else ("li.price", "li.name, li.price")
+            rows = self.conn.execute(f"""
+                {cte}
+                SELECT iv.i, li.name, {price_col},{self.ITEM_AGGREGATES}
+                FROM line_items li JOIN transactions t ON t.id = li.txn_id {join}
+                WHERE {valid} AND li.valid = 1{span}
+                GROUP BY iv.i, {group_by}
+            """, params).fetchall()
+
+        for row in rows:
+            self._add_item_row(results[row[0]][0], row[1:], stock_only)
+
+        return [(stats, counts[i].get('inventory', 0), counts[i].get('sales', 0), corrections[i])
+                for i, (stats, _, _, _) in enumerate(results)]
+
+    def sales_by_unit(self, lo_epoch: float, hi_epoch: float, unit: int) -> Dict[float, Dict[str, List]]:
+        """Sold [qty, sales] per product for each hour (unit=3600) or day (unit=86400), grouped in SQL."""
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT CAST(t.ts_epoch / ? AS INTEGER) * ?, li.name, SUM(li.qty),
+                    SUM(CASE WHEN t.type = 'sales' THEN li.subtotal ELSE li.qty * li.price END)
+                FROM line_items li JOIN transactions t ON t.id = li.txn_id
+                WHERE t.ts_epoch BETWEEN ? AND ? AND li.valid = 1
+                  AND (t.type = 'sales' OR (t.type = 'correction' AND t.ref_type = 'sales'))
+                GROUP BY 1, li.name
+            """, (unit, unit, lo_epoch, hi_epoch)).fetchall()
+
+        units = {}
+        for epoch, name, qty, amt in rows:
+            units.setdefault(float(epoch), {})[name] = [qty, amt]
+        return units
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+# --- PERSISTENCE WORKER ---
+class PersistenceWorker(threading.Thread):
+    """
+    Write-behind thread that owns ledger and config disk writes.
+    Jobs run in submission order; a job submitted with the key of one still queued
+    replaces it (moving to the back of the queue), so bursts of saves coalesce into
+    one write. Results are posted to `completed` as (callback, error) pairs for the
+    Tk thread to deliver.
+    """
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.completed: queue.Queue = queue.Queue()
+        self._cond = threading.Condition()
+        self._jobs: List[Dict] = []
+        self._busy = False
+
+    def submit(self, fn, key: Optional[str] = None, callback=None) -> None:
+        with self._cond:
+            callbacks = [callback] if callback else []
+            if key is not None:
+                for job in self._jobs:
+                    if job["key"] == key:
+                        self._jobs.remove(job)
+                        callbacks = job["callbacks"] + callbacks
+                        break
+            self._jobs.append({"key": key, "fn": fn, "callbacks": callbacks})
+            self._cond.notify_all()
+
+    def pending(self) -> bool:
+        with self._cond:
+            return bool(self._jobs) or self._busy
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every queued job has run; False if the timeout expired first."""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._jobs or self._busy:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self._jobs:
+                    self._cond.wait()
+                job = self._jobs.pop(0)
+                self._busy = True
+
+            error = None
+            try:
+                job["fn"]()
+            except Exception as e:
+                error = e
+
+            for callback in job["callbacks"]:
+                self.completed.put((callback, error))
+            if error is not None and not job["callbacks"]:
+                self.completed.put((None, error))
+
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
 # --- DATA MANAGER ---
+class SummaryCancelled(Exception):
+    """Raised by DataManager.summarize() when its cancel event is set."""
+
+
 class DataManager:
     """
     Handles all data persistence, calculation, and product management.
     Separates logic from UI.
     """
+    # Journal records appended before the snapshot is rewritten (compaction)
+    JOURNAL_COMPACT_THRESHOLD = 500
+    BACKUP_BASES_KEPT = 7
+    # Stock checkpoints retained; startup uses the newest one that still matches the ledger
+    STOCK_CHECKPOINTS_KEPT = 3
+    # Memoized calculate_stats/summarize results (LRU)
+    STATS_CACHE_SIZE = 32
+    # sales_by_bucket granularities and groupings
+    SALES_BUCKETS = {"hour": datetime.timedelta(hours=1), "day": datetime.timedelta(days=1),
+                     "week": datetime.timedelta(days=7)}
+    SALES_GROUPS = ("product", "category")
+    # Sales velocity is rebuilt from this many half-lives of history (older sales weigh < 1e-6 each)
+    VELOCITY_HORIZON_HALF_LIVES = 20
+    MIN_VELOCITY = 1e-6  # Units per day below which an item counts as not selling
+    CATALOG_CACHE_VERSION = 1  # Bump when the parsed catalog layout changes
+    ROLLUP_VERSION = 2  # Bump when the persisted rollup layout changes
+
     def __init__(self, modules: AppModules):
         self.mod = modules
         self.products_df: Any = None  # Pandas DataFrame
-        self.ledger: List[Dict] = []
+        self.ledger: ColumnarLedger = ColumnarLedger()
         self.product_history: List[Dict] = []
         self.summary_count: int = 0
         self.shortcuts_asked: bool = False
         self.business_name: str = "My Business"
         self.startup_stats: Dict = {}
         self._ledger_lock = threading.Lock()
+        self._backup_lock = threading.Lock()
+        # Serializes background summary computation with ledger, stock and catalog changes
+        self._data_lock = threading.RLock()
+
+        self._next_backup_due: Optional[float] = None
+        self._journal_count: int = 0
+        self._journal_pending: List[str] = []  # Encoded records waiting for the journal job
+        self._journal_lock = threading.Lock()
+        # Write-behind persistence; None until start_write_behind(), so writes run inline
+        self.writer: Optional[PersistenceWorker] = None
+        self.store: Optional[SQLiteLedgerStore] = None  # Set when the SQLite backend is enabled
+
+        # Timestamp index: parsed epochs sorted ascending, with the ledger position of each
+        self._ts_epochs = array('d')
+        self._ts_positions = array('l')
+        self._ts_malformed: List[int] = []  # Positions whose timestamp could not be parsed
+
+        # Daily rollups: day -> counts, corrections, per product/price [in, out, sales, has_in, has_sales,
+        # first-seen key (see seen_key)]
+        # and per hour ("HH") and product the sold [qty, sales] behind sales_by_bucket
+        self.rollups: Dict[str, Dict] = {}
+        self._line_table: Optional[LineItemTable] = None  # Built on first use by the vectorized engine
+        # Sales velocity: name -> [decayed units sold, epoch decayed to]; built on first use
+        self._velocity: Optional[Dict[str, List[float]]] = None
+        self._velocity_lambda: float = 0.0
+        # Closed periods (Z-reports): day -> frozen in/out counts, corrections [ledger position, filename]
+        # and per product/price [in, out, sales]; stats for whole closed days read these instead of the ledger
+        self.closed_days: Dict[str, Dict] = {}
+
+        # Bumped on every ledger or stock change; memoized results are keyed on it
+        self.ledger_version: int = 0
+        self._stats_cache: OrderedDict = OrderedDict()
 
         # Caches
         self.stock_cache: Dict[str, Dict] = {}
         self.name_lookup_cache: Dict[str, Dict] = {}
         self.display_name_map: Dict[str, str] = {}  # Full Name -> Smart Display Name
+        self.catalog_version: int = 0  # Bumped whenever products_df is replaced
+        self._catalog_names: Optional[Tuple[int, Set[str]]] = None
+        self.reorder_levels: Dict[str, int] = {}  # Product Name -> "Reorder Level" column of products.xlsx
+        # Low-stock alerts: products at or below their reorder level, and the ones not yet in an email digest
+        self.low_stock: Dict[str, Dict] = {}
+        self._digest_pending: Dict[str, Dict] = {}
+        self.alert_listener = None  # Called (Tk thread) whenever low_stock changes
         self.config: Dict = {}
         self.date_fmt = "%Y-%m-%d %H:%M:%S"
 
+        # Month partitions (JSON backend): self.ledger holds only the loaded suffix of the
+        # history, starting at global position _ledger_base / partition _loaded_from
+        self.partitions = LedgerPartitions(PARTITION_DIR, self.date_fmt)
+        self._ledger_base: int = 0
+        self._loaded_from: int = 0
+        self._partition_migration: bool = False
+
         self.load_config()
-        self.create_rolling_backup()
+        self.partitions.compressed = self.config.get("ledger_compression", False)
+        self._open_ledger_store()
         self.load_ledger()
+        self._load_closed_days()
+        self.create_rolling_backup()
         self.load_products()
-        self.refresh_stock_cache()
+        self.load_stock_cache()
 
     def load_config(self) -> None:
         default = {
@@ -131,7 +1303,18 @@ class DataManager:
             "recipient_email": "",
             "last_bi_date": "",
             "touch_mode": False,
-            "last_email_sync": ""
+            "last_email_sync": "",
+            "ledger_journal": True,
+            "ledger_backend": "json",
+            "ledger_compression": False,
+            "group_commit_ms": 0,  # Journal job waits this long so a burst of receipts shares one fsync
+            "stats_engine": "rollups",  # "vectorized": pandas/NumPy over the flattened line items
+            "backup_interval_minutes": 15,
+            "backup_full_hours": 24,
+            "catchup_interval_hours": 0,  # 0: three equal catchup intervals
+            "velocity_half_life_days": 7,
+            "low_stock_digest_minutes": 0,  # Batched low-stock email every N minutes; 0: off
+            "auto_close_days": True  # Freeze each finished day's totals (Z-report)
         }
         if os.path.exists(CONFIG_FILE):
             try:
@@ -144,12 +1327,358 @@ class DataManager:
 
     def save_config(self) -> None:
         try:
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(self.config, f)
+            text = json.dumps(self.config)
         except Exception as e:
             print(f"Config Save Error: {e}")
+            return
+
+        def write():
+            try:
+                with open(CONFIG_FILE, 'w') as f:
+                    f.write(text)
+            except Exception as e:
+                print(f"Config Save Error: {e}")
+        self._persist(write, key="config")
+
+    # --- Write-Behind Persistence ---
+    def start_write_behind(self) -> None:
+        """Hands ledger and config writes to a PersistenceWorker thread from now on."""
+        if self.writer is None:
+            self.writer = PersistenceWorker()
+            self.writer.start()
+
+    def flush_writes(self, timeout: Optional[float] = None) -> bool:
+        """Waits for queued writes to reach disk; False if the timeout expired first."""
+        if self.writer is None:
+            return True
+        return self.writer.flush(timeout)
+
+    def _persist(self, job, key: Optional[str] = None, callback=None) -> None:
+        """
+        Runs a write job on the persistence worker, or inline before it is started.
+        callback(error) is called once the job has finished, error being None on success.
+        """
+        if self.writer:
+            self.writer.submit(job, key, callback)
+            return
+        error = None
+        try:
+            job()
+        except Exception as e:
+            error = e
+        if callback:
+            callback(error)
+        elif error is not None:
+            messagebox.showerror("Save Error", f"Could not save database: {error}")
+
+    def _open_ledger_store(self) -> None:
+        if self.config.get("ledger_backend", "json") != "sqlite":
+            return
+        try:
+            self.store = SQLiteLedgerStore(LEDGER_DB_FILE, self.date_fmt)
+        except Exception as e:
+            print(f"SQLite Store Error: {e}")
+            self.store = None  # Fall back to the JSON ledger
 
     def load_ledger(self) -> None:
+        if self.store:
+            self._load_store_ledger()
+        else:
+            self._load_json_ledger()
+        self._rebuild_ts_index()
+        self._load_rollups()
+        if self._partition_migration:
+            self.save_ledger()  # Split a legacy single-file ledger into month partitions
+
+    # --- Partition Loading ---
+    def ledger_length(self) -> int:
+        """Total number of transactions, including cold partitions not yet loaded."""
+        return self._ledger_base + len(self.ledger)
+
+    def _local(self, pos: int) -> int:
+        """Index into self.ledger for a global ledger position, loading its partition on demand."""
+        if pos < self._ledger_base:
+            self._load_cold_partitions(self.partitions.index_of_position(pos))
+        return pos - self._ledger_base
+
+    def _txn(self, pos: int) -> Dict:
+        """Transaction at a global ledger position, loading its partition on demand."""
+        return self.ledger[self._local(pos)]
+
+    def _load_cold_partitions(self, first_idx: int) -> None:
+        """Prepends partitions first_idx.. up to the loaded ones, keeping the loaded range contiguous."""
+        with self._data_lock:
+            if first_idx >= self._loaded_from:
+                return
+            self.flush_writes()  # A renamed partition may still be queued for writing
+            older = ColumnarLedger()
+            for idx in range(first_idx, self._loaded_from):
+                older.extend(self.partitions.read(idx))
+            loaded = len(older)
+            older.extend(self.ledger)
+            self.ledger = older
+            self._ledger_base -= loaded
+            self._loaded_from = first_idx
+            self._rebuild_ts_index()
+
+    def _ensure_range_loaded(self, lo_epoch: float, hi_epoch: float) -> None:
+        if self._loaded_from == 0:
+            return
+        needed = [idx for idx in self.partitions.overlapping(lo_epoch, hi_epoch) if idx < self._loaded_from]
+        if needed:
+            self._load_cold_partitions(min(needed))
+
+    def _malformed_positions(self) -> List[int]:
+        if self._loaded_from:
+            needed = [idx for idx in self.partitions.with_malformed() if idx < self._loaded_from]
+            if needed:
+                self._load_cold_partitions(min(needed))
+        return list(self._ts_malformed)
+
+    def _iter_all_transactions(self):
+        """
+        Streams the complete history without loading it: cold partitions are read
+        straight from disk, then the loaded ledger follows (exports).
+        """
+        with self._data_lock:
+            cold = self._loaded_from
+            if cold:
+                self.flush_writes()  # A renamed partition may still be queued for writing
+            ledger = self.ledger
+        for idx in range(cold):
+            yield from self.partitions.read(idx)
+        yield from ledger
+
+    def get_all_transactions(self) -> List[Dict]:
+        """The complete history as plain dicts; loads every cold partition (restore, harmonize, backup, export)."""
+        self._load_cold_partitions(0)
+        return list(self.ledger)
+
+    def _rebuild_ts_index(self) -> None:
+        self._ts_epochs = array('d')
+        self._ts_positions = array('l')
+        self._ts_malformed = []
+
+        parsed = []
+        for idx in range(len(self.ledger)):
+            pos = self._ledger_base + idx
+            dt = parse_ledger_timestamp(self.ledger.get(idx, 'timestamp'), self.date_fmt)
+            if dt is None:
+                self._ts_malformed.append(pos)
+            else:
+                parsed.append((naive_epoch(dt), pos))
+
+        parsed.sort()
+        self._ts_epochs.extend(e for e, _ in parsed)
+        self._ts_positions.extend(p for _, p in parsed)
+
+    def _index_transaction(self, pos: int, transaction: Dict) -> None:
+        dt = parse_ledger_timestamp(transaction.get('timestamp'), self.date_fmt)
+        if dt is None:
+            self._ts_malformed.append(pos)
+            return
+
+        epoch = naive_epoch(dt)
+        if not self._ts_epochs or epoch >= self._ts_epochs[-1]:
+            self._ts_epochs.append(epoch)
+            self._ts_positions.append(pos)
+        else:
+            # Back-dated entry: keep the index sorted
+            idx = bisect.bisect_right(self._ts_epochs, epoch)
+            self._ts_epochs.insert(idx, epoch)
+            self._ts_positions.insert(idx, pos)
+
+    def _positions_in_range(self, lo_epoch: float, hi_epoch: float, hi_inclusive: bool = True) -> List[int]:
+        """Ledger positions of well-formed timestamps with lo_epoch <= epoch <= hi_epoch (index order)."""
+        self._ensure_range_loaded(lo_epoch, hi_epoch)
+        lo = bisect.bisect_left(self._ts_epochs, lo_epoch)
+        if hi_inclusive:
+            hi = bisect.bisect_right(self._ts_epochs, hi_epoch)
+        else:
+            hi = bisect.bisect_left(self._ts_epochs, hi_epoch)
+        return list(self._ts_positions[lo:hi])
+
+    def _positions_in_period(self, start: datetime.datetime, end: datetime.datetime) -> List[int]:
+        """Ledger positions with start <= timestamp <= end, in ledger order."""
+        positions = self._positions_in_range(naive_epoch(start), naive_epoch(end))
+
+        # Malformed timestamps count as "now", as they always have
+        if start <= datetime.datetime.now() <= end:
+            positions.extend(self._malformed_positions())
+        positions.sort()
+        return positions
+
+    # --- Daily Rollups ---
+    def _rollup_transaction(self, pos: int) -> None:
+        """Folds the transaction at a ledger position into its day's rollup, mirroring calculate_stats semantics."""
+        idx = self._local(pos)
+        ledger = self.ledger
+        t_type = ledger.get(idx, 'type')
+        if not t_type: return
+        dt = parse_ledger_timestamp(ledger.get(idx, 'timestamp'), self.date_fmt)
+        if dt is None: return  # Malformed timestamps are aggregated live as "now"
+
+        day_key = dt.strftime("%Y-%m-%d")
+        day = self.rollups.get(day_key)
+        if day is None:
+            day = self.rollups[day_key] = {"in_count": 0, "out_count": 0, "corrections": [], "items": {}, "hours": {}}
+
+        if t_type == 'correction':
+            day["corrections"].append([pos, ledger.get(idx, 'filename', 'Unknown')])
+        if t_type == 'inventory':
+            day["in_count"] += 1
+        elif t_type == 'sales':
+            day["out_count"] += 1
+
+        ref_type = ledger.get(idx, 'ref_type')
+        hour = day["hours"].setdefault(f"{dt.hour:02d}", {}) \
+            if t_type == 'sales' or (t_type == 'correction' and ref_type == 'sales') else None
+        try:
+            for line, (name, qty, price, subtotal) in enumerate(ledger.lines(idx)):
+                prices = day["items"].setdefault(name, {})
+                cell = prices.get(price)
+                if cell is None:
+                    cell = prices[price] = [0, 0, 0.0, 0, 0, None]
+
+                # Rolled up in ledger order: the first sales line, else the first inventory line, sets the key
+                is_out = t_type == 'sales' or (t_type == 'correction' and ref_type == 'sales')
+                is_in = t_type == 'inventory' or (t_type == 'correction' and ref_type == 'inventory')
+                first = seen_key(is_out, pos, line) \
+                    if (is_out and not cell[4]) or (is_in and not cell[3] and not cell[4]) else None
+
+                if t_type == 'sales':
+                    amt = float(subtotal)
+                    cell[1] += qty
+                    cell[2] += amt
+                    cell[4] = 1
+                    sold = hour.setdefault(name, [0, 0.0])
+                    sold[0] += qty
+                    sold[1] += amt
+                elif t_type == 'inventory':
+                    cell[0] += qty
+                    cell[3] = 1
+                elif t_type == 'correction':
+                    if ref_type == 'sales':
+                        cell[1] += qty
+                        cell[2] += qty * price
+                        cell[4] = 1
+                        sold = hour.setdefault(name, [0, 0.0])
+                        sold[0] += qty
+                        sold[1] += qty * price
+                    elif ref_type == 'inventory':
+                        cell[0] += qty
+                        cell[3] = 1
+                if first:
+                    cell[5] = first
+        except Exception:
+            pass
+
+    def _rebuild_rollups(self) -> None:
+        self.rollups = {}
+        self._load_cold_partitions(0)
+        for pos in range(len(self.ledger)):
+            self._rollup_transaction(pos)
+
+    def _ledger_fingerprint(self, count: int) -> str:
+        if count <= 0 or count > self.ledger_length():
+            return ""
+        pos = count - 1
+        if pos < self._ledger_base:
+            # Partition boundaries are fingerprinted from the manifest without loading the partition
+            idx = self.partitions.index_of_position(pos)
+            part = self.partitions.parts[idx]
+            if part.get("last") and pos == self.partitions.offset(idx) + part["count"] - 1:
+                ts, fname = part["last"]
+                return f"{count}|{ts}|{fname}"
+        last = self._txn(pos)
+        return f"{count}|{last.get('timestamp')}|{last.get('filename')}"
+
+    def _load_rollups(self) -> None:
+        """Loads persisted rollups and folds in only the transactions appended after them."""
+        self.rollups = {}
+        if self.store:
+            return  # The SQLite store aggregates in SQL
+
+        try:
+            with open(ROLLUP_FILE, 'r') as f:
+                data = json.load(f)
+            count = int(data.get("txn_count", -1))
+            days = data.get("days", {})
+            if any("hours" not in day for day in days.values()):
+                raise ValueError("rollups predate hourly sales")
+            if data.get("version") != self.ROLLUP_VERSION:
+                raise ValueError("rollups predate first-seen price keys")
+            if 0 <= count <= self.ledger_length() and data.get("fingerprint") == self._ledger_fingerprint(count):
+                for day_key, day in days.items():
+                    day["items"] = {name: {float(p): cell for p, cell in prices.items()}
+                                    for name, prices in day["items"].items()}
+                    self.rollups[day_key] = day
+                for pos in range(count, self.ledger_length()):
+                    self._rollup_transaction(pos)
+                return
+        except Exception:
+            pass  # Missing or stale: rebuild below
+
+        self._rebuild_rollups()
+
+    def _split_period(self, start: datetime.datetime, end: datetime.datetime) -> Tuple[List[str], List[int]]:
+        """
+        Splits a period into whole days answered by rollups and the ledger positions
+        of the partial days at either edge (plus malformed entries, which count as now).
+        """
+        first_day = start.date()
+        if start != datetime.datetime.combine(first_day, datetime.time()):
+            first_day += datetime.timedelta(days=1)
+        last_day = end.date()
+        if end.time() < datetime.time(23, 59, 59):
+            last_day -= datetime.timedelta(days=1)
+
+        if first_day > last_day:
+            return [], self._positions_in_period(start, end)
+
+        full_start = naive_epoch(datetime.datetime.combine(first_day, datetime.time()))
+        full_end = naive_epoch(datetime.datetime.combine(last_day + datetime.timedelta(days=1), datetime.time()))
+        positions = self._positions_in_range(naive_epoch(start), full_start, hi_inclusive=False)
+        positions += self._positions_in_range(full_end, naive_epoch(end))
+        if start <= datetime.datetime.now() <= end:
+            positions.extend(self._malformed_positions())
+        positions.sort()
+
+        first_key, last_key = first_day.strftime("%Y-%m-%d"), last_day.strftime("%Y-%m-%d")
+        days = [k for k in self.rollups if first_key <= k <= last_key]
+        return days, positions
+
+    def _load_store_ledger(self) -> None:
+        # One-shot migration of the existing JSON ledger (partitions + journal)
+        if self.store.get_meta("migrated_from") is None or self.config.get("ledger_migrate_pending"):
+            self._load_json_ledger()
+            self.store.replace_all(self.get_all_transactions())
+            self.store.set_meta({
+                "summary_count": self.summary_count,
+                "shortcuts_asked": self.shortcuts_asked,
+                "product_history": self.product_history,
+                "migrated_from": LEDGER_FILE
+            })
+            self.config.pop("ledger_migrate_pending", None)
+            self.save_config()
+
+        self.ledger = ColumnarLedger(self.store.load_transactions())
+        self._ledger_base = 0
+        self._loaded_from = 0
+        self.summary_count = self.store.get_meta("summary_count", 0)
+        self.shortcuts_asked = self.store.get_meta("shortcuts_asked", False)
+        self.product_history = self.store.get_meta("product_history", [])
+
+    def _load_json_ledger(self) -> None:
+        """
+        Loads ledger.json metadata and only the newest (hot) month partition.
+        A legacy single-file ledger is loaded whole and split into partitions on save.
+        """
+        self.ledger = []
+        self._ledger_base = 0
+        self._loaded_from = 0
+        partitioned = False
+
         if os.path.exists(LEDGER_FILE):
             try:
                 with open(LEDGER_FILE, 'r') as f:
@@ -164,70 +1693,387 @@ class DataManager:
                         self.summary_count = data.get("summary_count", 0)
                         self.shortcuts_asked = data.get("shortcuts_asked", False)
                         self.product_history = data.get("product_history", [])
+                        partitioned = data.get("partitioned", False)
             except:
                 self.ledger = []
                 self.product_history = []
 
-        # Optimization: Pre-parse dates could happen here if we used custom objects,
-        # but to keep JSON compatibility simple, we'll parse on demand or keep a shadow index if needed.
-        # For <10k records, on-demand parsing in calculate_stats is usually fine, but let's be careful.
+        if partitioned and self.partitions.exists():
+            try:
+                self.partitions.load_manifest()
+                if self.partitions.parts:
+                    hot = len(self.partitions.parts) - 1
+                    self.ledger = ColumnarLedger(self.partitions.read(hot))
+                    self._ledger_base = self.partitions.offset(hot)
+                    self._loaded_from = hot
+                    # The hot partition may be newer than the manifest after a crash
+                    if self.partitions.parts[hot]["count"] != len(self.ledger):
+                        self.partitions.recount(hot, self.ledger)
+            except Exception as e:
+                print(f"Partition Load Error: {e}")
+                self.ledger = []
+        elif self.ledger:
+            self.partitions.reset(self.ledger)
+            self._partition_migration = True
 
-    def create_rolling_backup(self) -> None:
-        """Creates a rolling backup of the ledger file in a background thread."""
-        if not os.path.exists(LEDGER_FILE):
-            return
+        if not isinstance(self.ledger, ColumnarLedger):
+            self.ledger = ColumnarLedger(self.ledger)
+        self._replay_journal()
 
-        thread = threading.Thread(target=self._perform_backup, daemon=True)
-        thread.start()
+    def _replay_journal(self) -> None:
+        """
+        Appends journaled transactions written after the last snapshot.
+        Each record carries its ledger position, so records already folded into
+        the snapshot are skipped and a torn final line stops the replay.
+        """
+        self._journal_count = 0
+        try:
+            for seq, transaction in self._read_journal(LEDGER_JOURNAL_FILE):
+                if seq < self.ledger_length():
+                    continue  # Already part of the snapshot
+                if seq > self.ledger_length():
+                    break  # Gap in the journal
+                self.ledger.append(transaction)
+                self.partitions.note_append(transaction)
+                self._journal_count += 1
+        except Exception as e:
+            print(f"Journal Replay Error: {e}")
 
-    def _perform_backup(self):
-        """The actual backup logic to be run in a thread."""
+    @staticmethod
+    def _read_journal(path: str):
+        """Yields (seq, transaction) records, stopping at a torn line."""
+        if not os.path.exists(path):
+            return
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line: continue
+                try:
+                    record = json.loads(line)
+                    seq = int(record["seq"])
+                    transaction = record["transaction"]
+                except Exception:
+                    return  # Torn write from a crash; everything after it is unusable
+                yield seq, transaction
+
+    def read_partitioned_backup(self, meta_path: str) -> List[Dict]:
+        """Full history of a rolling backup folder: its month partitions plus its journal."""
+        folder = os.path.dirname(meta_path)
+        partitions = LedgerPartitions(os.path.join(folder, os.path.basename(PARTITION_DIR)), self.date_fmt)
+        partitions.load_manifest()
+        transactions = []
+        for idx in range(len(partitions.parts)):
+            transactions.extend(partitions.read(idx))
+        for seq, transaction in self._read_journal(os.path.join(folder, os.path.basename(LEDGER_JOURNAL_FILE))):
+            if seq > len(transactions):
+                break
+            if seq == len(transactions):
+                transactions.append(transaction)
+        return transactions
+
+    def _append_journal(self, transaction: Dict, callback=None) -> None:
+        """Queues a transaction record for the journal; callback(error) fires once it is fsynced."""
+        record = {"seq": self.ledger_length() - 1, "transaction": transaction}
+        with self._journal_lock:
+            self._journal_pending.append(json.dumps(record) + "\n")
+        self._journal_count += 1
+        self._persist(self._flush_journal_pending, key="journal", callback=callback)
+
+    def _flush_journal_pending(self) -> None:
+        """
+        Journal job: writes every record queued so far with one write + fsync. On the
+        persistence worker it first waits group_commit_ms, so records appended meanwhile
+        join the same write; their own journal jobs then find nothing left and just
+        report the records durable.
+        """
+        with self._journal_lock:
+            if not self._journal_pending:
+                return  # Already written by the job before this one
+        window = float(self.config.get("group_commit_ms", 0)) / 1000.0
+        if window > 0 and self.writer is not None:
+            time.sleep(window)
+        with self._journal_lock:
+            lines, self._journal_pending = self._journal_pending, []
+        if not lines:
+            return
         try:
-            with self._ledger_lock:
-                if not os.path.exists(LEDGER_FILE):
-                    return
+            self._write_journal("".join(lines))
+        except Exception:
+            with self._journal_lock:
+                self._journal_pending[:0] = lines  # Retried, in order, by the next journal job
+            raise
+
+    def _write_journal(self, text: str) -> None:
+        with self._ledger_lock:
+            with open(LEDGER_JOURNAL_FILE, 'a') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def create_rolling_backup(self, force: bool = False) -> None:
+        """
+        Scheduled incremental backup in a background thread: at most once per
+        backup_interval_minutes, a gzip delta of the transactions appended since
+        the previous backup point, or a full base every backup_full_hours.
+        An empty ledger is not backed up; the first base waits for the first transaction.
+        """
+        if not self.ledger_length():
+            return
+        now = time.time()
+        if self._next_backup_due is None:
+            points = self.list_backup_points()
+            self._next_backup_due = points[0]["epoch"] + self._backup_interval() if points else now
+        if not force and now < self._next_backup_due:
+            return
+        self._next_backup_due = now + self._backup_interval()
+
+        # Snapshot on the calling thread; transactions are never mutated once appended
+        snapshot = {
+            "transactions": self.ledger.copy(),
+            "base": self._ledger_base,
+            "cold_files": [os.path.join(self.partitions.directory, part["file"])
+                           for part in self.partitions.parts[:self._loaded_from]],
+            "meta": {
+                "summary_count": self.summary_count,
+                "shortcuts_asked": self.shortcuts_asked,
+                "product_history": list(self.product_history)
+            },
+            "epoch": now
+        }
+        thread = threading.Thread(target=self._perform_backup, args=(snapshot,), daemon=True)
+        thread.start()
 
-                timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
-                backup_name = f"ledger_backup_{timestamp}.json"
-                backup_path = os.path.join(BACKUP_DIR, backup_name)
-                shutil.copy2(LEDGER_FILE, backup_path)
+    def _backup_interval(self) -> float:
+        return max(1, int(self.config.get("backup_interval_minutes", 15))) * 60
 
-            # Cleanup can happen outside the lock
-            backups = [
-                os.path.join(BACKUP_DIR, f)
-                for f in os.listdir(BACKUP_DIR)
-                if f.startswith("ledger_backup_") and f.endswith(".json")
-            ]
-            backups.sort(key=os.path.getctime)
+    def _perform_backup(self, snapshot: Dict):
+        """The actual backup logic to be run in a thread."""
+        try:
+            with self._backup_lock:
+                transactions, base = snapshot["transactions"], snapshot["base"]
+                cold: List[Dict] = []
+
+                def history(start: int) -> List[Dict]:
+                    """Transactions from global position start; cold partitions are read only when needed."""
+                    if start >= base:
+                        return transactions[start - base:]
+                    if not cold:
+                        for path in snapshot["cold_files"]:
+                            cold.extend(iter_ledger_file(path))
+                    return cold[start:] + transactions[:]
+
+                def fingerprint(count: int) -> str:
+                    if count <= 0:
+                        return ""
+                    last = transactions[count - 1 - base] if count - 1 >= base else history(count - 1)[0]
+                    return f"{count}|{last.get('timestamp')}|{last.get('filename')}"
+
+                length = base + len(transactions)
+                points = self._read_backup_index()
+                last = points[-1] if points else None
+                full_age = float(self.config.get("backup_full_hours", 24)) * 3600
+
+                if last is None or snapshot["epoch"] - self._backup_base_epoch(points, last) >= full_age \
+                        or length < last["position"] or fingerprint(last["position"]) != last["fingerprint"]:
+                    kind, start = "base", 0
+                elif length == last["position"] and snapshot["meta"]["summary_count"] == last.get("summary_count"):
+                    return  # Nothing new since the last backup point
+                else:
+                    kind, start = "delta", last["position"]
+
+                stamp = datetime.datetime.fromtimestamp(snapshot["epoch"]).strftime("%Y%m%d-%H%M%S")
+                filename = f"{kind}-{stamp}-{length}.json.gz"
+                payload = {
+                    "kind": kind,
+                    "from": start,
+                    "position": length,
+                    "transactions": history(start),
+                    "meta": snapshot["meta"]
+                }
+                temp_file = os.path.join(BACKUP_DIR, filename + ".tmp")
+                with gzip.open(temp_file, 'wt', encoding='utf-8') as f:
+                    json.dump(payload, f)
+                os.replace(temp_file, os.path.join(BACKUP_DIR, filename))
+
+                points.append({
+                    "file": filename,
+                    "kind": kind,
+                    "base": filename if kind == "base" else last["base"],
+                    "timestamp": datetime.datetime.fromtimestamp(snapshot["epoch"]).strftime(self.date_fmt),
+                    "epoch": snapshot["epoch"],
+                    "position": length,
+                    "fingerprint": fingerprint(length),
+                    "summary_count": snapshot["meta"]["summary_count"]
+                })
+                points = self._prune_backup_points(points)
 
-            while len(backups) > 10:
-                os.remove(backups.pop(0))
+                temp_file = BACKUP_INDEX_FILE + ".tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump({"points": points}, f, indent=2)
+                os.replace(temp_file, BACKUP_INDEX_FILE)
 
         except Exception as e:
             print(f"Backup Error: {e}")
 
-    def save_ledger(self) -> None:
+    @staticmethod
+    def _backup_base_epoch(points: List[Dict], point: Dict) -> float:
+        for candidate in points:
+            if candidate["file"] == point["base"]:
+                return candidate["epoch"]
+        return 0.0
+
+    def _prune_backup_points(self, points: List[Dict]) -> List[Dict]:
+        """Keeps the newest BACKUP_BASES_KEPT chains (base + its deltas) and deletes the rest."""
+        bases = [p["file"] for p in points if p["kind"] == "base"]
+        kept = set(bases[-self.BACKUP_BASES_KEPT:])
+        for point in points:
+            if point["base"] not in kept:
+                try:
+                    os.remove(os.path.join(BACKUP_DIR, point["file"]))
+                except OSError:
+                    pass
+        return [p for p in points if p["base"] in kept]
+
+    def _read_backup_index(self) -> List[Dict]:
         try:
-            data = {
-                "transactions": self.ledger,
-                "summary_count": self.summary_count,
-                "shortcuts_asked": self.shortcuts_asked,
-                "product_history": self.product_history
-            }
+            with open(BACKUP_INDEX_FILE, 'r') as f:
+                return json.load(f).get("points", [])
+        except Exception:
+            return []
+
+    def list_backup_points(self) -> List[Dict]:
+        """Restorable backup points, newest first."""
+        return list(reversed(self._read_backup_index()))
+
+    def load_backup_point(self, point: Dict) -> Tuple[List[Dict], Dict]:
+        """Rebuilds the ledger at a backup point from its base and the deltas up to it."""
+        with self._backup_lock:
+            chain = [p for p in self._read_backup_index()
+                     if p["base"] == point["base"] and p["position"] <= point["position"]
+                     and p["epoch"] <= point["epoch"]]
+
+        transactions: List[Dict] = []
+        meta: Dict = {}
+        for entry in chain:
+            with gzip.open(os.path.join(BACKUP_DIR, entry["file"]), 'rt', encoding='utf-8') as f:
+                payload = json.load(f)
+            if payload["from"] != len(transactions):
+                raise ValueError(f"Backup chain is broken at {entry['file']}")
+            transactions.extend(payload["transactions"])
+            meta = payload.get("meta", {})
+        return transactions, meta
+
+    def save_ledger(self, callback=None) -> None:
+        """
+        Writes a full snapshot of the ledger and folds the journal into it.
+        The snapshot is captured here; the disk writes run on the persistence worker.
+        """
+        meta = {
+            "summary_count": self.summary_count,
+            "shortcuts_asked": self.shortcuts_asked,
+            "product_history": list(self.product_history)
+        }
+        if self.store:
+            # Transactions are already durable row by row; only the metadata changes here
+            self._persist(lambda: self.store.set_meta(meta), key="meta", callback=callback)
+            return
 
-            with self._ledger_lock:
-                # Atomic Write
-                temp_file = LEDGER_FILE + ".tmp"
+        snapshot = self._capture_json_ledger(meta)
+        self._persist(lambda: self._write_json_ledger(snapshot), key="ledger", callback=callback)
+
+    def _capture_json_ledger(self, meta: Dict) -> Dict:
+        """State a ledger write needs, taken on the Tk thread so the write never sees later appends."""
+        rollups = None
+        try:
+            rollups = json.dumps({
+                "version": self.ROLLUP_VERSION,
+                "txn_count": self.ledger_length(),
+                "fingerprint": self._ledger_fingerprint(self.ledger_length()),
+                "days": self.rollups
+            })
+        except Exception as e:
+            print(f"Rollup Save Error: {e}")
+        # Records journaled so far are covered by this snapshot
+        self._journal_count = 0
+        self._partition_migration = False
+        return {
+            "ledger": self.ledger.copy(),
+            "base": self._ledger_base,
+            "partitions": self.partitions.capture(),
+            "meta": meta,
+            "rollups": rollups
+        }
+
+    def _write_json_ledger(self, snapshot: Dict) -> None:
+        """Writes dirty month partitions, the manifest and the ledger.json metadata, then drops the journal."""
+        data = {
+            "transactions": [],  # Held in month partitions
+            "partitioned": True,
+            **snapshot["meta"]
+        }
+
+        with self._ledger_lock:
+            self.partitions.write_captured(snapshot["partitions"], snapshot["ledger"], snapshot["base"])
+
+            # Atomic Write
+            temp_file = LEDGER_FILE + ".tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, LEDGER_FILE)
+
+            # Partitions now cover every record journaled before the snapshot; keep any
+            # later record a journal job already wrote while this snapshot was queued
+            length = snapshot["base"] + len(snapshot["ledger"])
+            later = [json.dumps({"seq": seq, "transaction": transaction}) + "\n"
+                     for seq, transaction in self._read_journal(LEDGER_JOURNAL_FILE) if seq >= length]
+            if later:
+                temp_file = LEDGER_JOURNAL_FILE + ".tmp"
                 with open(temp_file, 'w') as f:
-                    json.dump(data, f, indent=2)
+                    f.write("".join(later))
                     f.flush()
                     os.fsync(f.fileno())
-                os.replace(temp_file, LEDGER_FILE)
+                os.replace(temp_file, LEDGER_JOURNAL_FILE)
+            elif os.path.exists(LEDGER_JOURNAL_FILE):
+                os.remove(LEDGER_JOURNAL_FILE)
+
+        if snapshot["rollups"] is not None:
+            try:
+                temp_file = ROLLUP_FILE + ".tmp"
+                with open(temp_file, 'w') as f:
+                    f.write(snapshot["rollups"])
+                os.replace(temp_file, ROLLUP_FILE)
+            except Exception as e:
+                print(f"Rollup Save Error: {e}")
 
+    def set_ledger_compression(self, enabled: bool) -> None:
+        """Switches the partition/export format; the hot partition is rewritten now, older ones when next written."""
+        self.config["ledger_compression"] = enabled
+        self.save_config()
+        self.partitions.compressed = enabled
+        if not self.store and self.partitions.parts:
+            self.partitions.mark_dirty(len(self.partitions.parts) - 1)
+            self.save_ledger()
+
+    def write_json_layout(self) -> None:
+        """Writes the in-memory ledger as the partitioned JSON layout (used when leaving the SQLite store)."""
+        try:
+            self.flush_writes()
+            self.partitions.reset(self.get_all_transactions())
+            self._write_json_ledger(self._capture_json_ledger({
+                "summary_count": self.summary_count,
+                "shortcuts_asked": self.shortcuts_asked,
+                "product_history": list(self.product_history)
+            }))
         except Exception as e:
             messagebox.showerror("Save Error", f"Could not save database: {e}")
 
     def load_products(self) -> None:
+        with self._data_lock:  # A background summary reads the catalog
+            self._load_products()
+
+    def _load_products(self) -> None:
         pd = self.mod.pd
         req_cols = ["Business Name", "Product Category", "Product Name", "Price"]
 
@@ -239,138 +2085,219 @@ class DataManager:
             except:
                 pass
 
+        # Parsed catalog: business name (None: no such column), valid products, lookup and
+        # display names, reorder levels and rejections; an unchanged products.xlsx reuses the last one
+        catalog = self._load_catalog_cache()
+        if catalog is None:
+            catalog = self._parse_products()
+            if catalog is None:
+                self.products_df = pd.DataFrame(columns=req_cols)
+                self.catalog_version += 1
+                return
+            if catalog["sheet_normalized"]:
+                # Otherwise the names in the file are still uncleaned; parse it again next time
+                self._save_catalog_cache(catalog)
+
+        if catalog["business_name"] is not None:
+            self.business_name = catalog["business_name"]
+            self.config["cached_business_name"] = catalog["business_name"]
+        valid_products = catalog["products"]
+        seen_names = [p["Product Name"] for p in valid_products]
+        rejected_details = catalog["rejected_details"]
+        self.name_lookup_cache.update(catalog["lookup"])
+        self.display_name_map = dict(catalog["display_names"])
+
+        self.products_df = pd.DataFrame(valid_products)
+        self.catalog_version += 1
+        self.reorder_levels = dict(catalog["reorder_levels"])
+        self._refresh_low_stock()
+
+        # --- Product History Versioning ---
+        current_list = self.products_df.to_dict('records')
+
+        should_save_history = False
+        if not self.product_history:
+            should_save_history = True
+        else:
+            # Compare with latest
+            # Simple check: json dumps comparison to ensure deep equality including order if sorted,
+            # but list order matters in excel, so direct comparison is fine.
+            # However, we must ensure we are comparing compatible structures.
+            # 'records' gives list of dicts.
+            last_version = self.product_history[-1].get('items', [])
+            if current_list != last_version:
+                should_save_history = True
+
+        if should_save_history and current_list:
+            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.product_history.append({
+                "timestamp": timestamp,
+                "items": current_list
+            })
+            # Keep only last 4 versions (Current + 3 past)
+            if len(self.product_history) > 4:
+                self.product_history = self.product_history[-4:]
+            self.save_ledger()
+
+        # Stats
+        previous_products = set(self.config.get("previous_products", []))
+        current_products = set(seen_names)
+        self.startup_stats = {
+            "total": len(valid_products),
+            "new": len(current_products - previous_products),
+            "rejected": len(rejected_details),
+            "phased_out": len(previous_products - current_products),
+            "rejected_details": rejected_details,
+            "cleaned_names": catalog["cleaned_names"]
+        }
+        self.config["previous_products"] = list(seen_names)
+        self.save_config()
+
+    def _parse_products(self) -> Optional[Dict]:
+        """
+        Reads, cleans and validates products.xlsx, writing the normalized sheet back if it differs.
+        Returns the parsed catalog (see _load_products), or None if the file cannot be read;
+        its "sheet_normalized" is False if the write-back failed.
+        """
+        pd = self.mod.pd
         raw_df = pd.DataFrame()
         try:
             raw_df = pd.read_excel(DATA_FILE)
+            as_read = sheet_cells(raw_df)  # To skip the write-back when normalizing changes nothing
             raw_df.columns = raw_df.columns.str.strip()
         except Exception as e:
             messagebox.showerror("Load Error", f"Error reading Excel: {e}")
-            self.products_df = pd.DataFrame(columns=req_cols)
-            return
+            return None
+
+        # --- Data Cleanup & Normalization (column-wise) ---
+        def as_text(col):
+            """str() of every cell, blanks (NaN, None) as "", as an object Series for the .str methods."""
+            return col.astype(str).where(col.notna(), "").astype(object)
 
-        # --- Data Cleanup & Normalization ---
-        def clean_text(text_val, is_product_name=False):
-            if pd.isna(text_val): return ""
-            s = str(text_val).upper()
-            s = s.replace("'", "")       # Remove apostrophes
-            s = s.replace("\n", " ")     # Single line
-            s = re.sub(r'\s+', ' ', s)   # Remove double spaces
+        def clean_text(col, is_product_name=False):
+            s = as_text(col).str.upper()
+            s = s.str.replace("'", "", regex=False)     # Remove apostrophes
+            s = s.str.replace("\n", " ", regex=False)   # Single line
+            s = s.str.replace(r'\s+', ' ', regex=True)  # Remove double spaces
             if is_product_name:
                 # Remove spaces between numbers and common units
-                s = re.sub(r'(\d+)\s+(MG|G|KG|ML|L|OZ|LB|CM|M|MM|PCS)\b', r'\1\2', s)
-            return s.strip()
+                s = s.str.replace(r'(\d+)\s+(MG|G|KG|ML|L|OZ|LB|CM|M|MM|PCS)\b', r'\1\2', regex=True)
+            return s.str.strip()
 
         cleaned_count = 0
         if 'Product Name' in raw_df.columns:
-            def clean_and_count(x):
-                nonlocal cleaned_count
-                orig = str(x)
-                new = clean_text(x, is_product_name=True)
-                # Count if effectively changed (ignoring NaN vs "" diff if original was nan)
-                if pd.notna(x) and orig != new:
-                    cleaned_count += 1
-                return new
-            raw_df['Product Name'] = raw_df['Product Name'].apply(clean_and_count)
+            names_col = raw_df['Product Name']
+            cleaned = clean_text(names_col, is_product_name=True)
+            # Count if effectively changed (ignoring NaN vs "" diff if original was nan)
+            cleaned_count = int((names_col.notna() & (as_text(names_col) != cleaned)).sum())
+            raw_df['Product Name'] = cleaned
 
         if 'Product Category' in raw_df.columns:
-            raw_df['Product Category'] = raw_df['Product Category'].apply(clean_text)
+            raw_df['Product Category'] = clean_text(raw_df['Product Category'])
 
         if 'Remarks' not in raw_df.columns:
             raw_df['Remarks'] = ""
 
         # Business Name Logic & Cleanup
+        business_name = None  # Unchanged when the sheet has no Business Name column
         if "Business Name" in raw_df.columns:
-            # Find first non-empty value
-            first_val = "My Business"
-            found_idx = -1
-
-            # Search for first valid string
-            for idx, val in enumerate(raw_df["Business Name"]):
-                s_val = str(val).strip()
-                if s_val and s_val.lower() != "nan":
-                    first_val = s_val
-                    found_idx = idx
-                    break
+            # First non-empty value; if nothing found, try config or keep default
+            stripped = as_text(raw_df["Business Name"]).str.strip()
+            filled = (stripped != "") & (stripped.str.lower() != "nan")
+            if filled.any():
+                business_name = stripped[filled].iloc[0]
+            else:
+                business_name = self.config.get("cached_business_name", "My Business")
 
-            # If nothing found, try config or keep default
-            if found_idx == -1:
-                first_val = self.config.get("cached_business_name", "My Business")
+        # --- Validation ---
+        blank = pd.Series("", index=raw_df.index, dtype=object)
+        cats = raw_df['Product Category'] if 'Product Category' in raw_df.columns else blank
+        names = raw_df['Product Name'] if 'Product Name' in raw_df.columns else blank
 
-            self.business_name = first_val
-            self.config["cached_business_name"] = first_val
+        if 'Price' in raw_df.columns:
+            raw_prices = raw_df['Price']
+            if pd.api.types.is_numeric_dtype(raw_prices):
+                prices = raw_prices.astype(float)
+            else:
+                # Text typed into the sheet: float() exactly as before, only for this rare case
+                def to_price(value):
+                    try:
+                        return float(value)
+                    except:
+                        return 0.0
+                prices = raw_prices.map(to_price).astype(float)
+            bad_price = (prices <= 0) | raw_prices.isna()
+        else:
+            bad_price = pd.Series(True, index=raw_df.index)
+            prices = pd.Series(0.0, index=raw_df.index)
+
+        bad_cat = ~bad_price & ((cats == "") | (cats == "NAN"))
+        bad_name = ~bad_price & ~bad_cat & ((names == "") | (names == "NAN"))
+        candidate = ~(bad_price | bad_cat | bad_name)
+        # The first otherwise valid row of a name wins; later ones are duplicates
+        duplicate = candidate & names.where(candidate).duplicated()
+        valid = candidate & ~duplicate
+
+        reasons = pd.Series("", index=raw_df.index, dtype=object)
+        reasons[duplicate] = "Duplicate Name"
+        reasons[bad_name] = "Invalid Name"
+        reasons[bad_cat] = "Invalid Category"
+        reasons[bad_price] = "Price <= 0"
+        raw_df['Remarks'] = reasons  # Cleared for valid rows
+
+        # Ensure Business Name is populated in memory even if empty in file row
+        if 'Business Name' in raw_df.columns:
+            b_names = as_text(raw_df['Business Name'])
+            b_missing = (b_names == "") | (b_names.str.lower() == "nan")
+        else:
+            b_names = blank
+            b_missing = pd.Series(True, index=raw_df.index)
+        fallback_b_name = business_name or self.business_name
+        levels = raw_df['Reorder Level'] if 'Reorder Level' in raw_df.columns else pd.Series(None, index=raw_df.index)
 
         valid_products = []
         seen_names = set()
         rejected_details = []
+        reorder_levels = {}
+        lookup = {}
+
+        for name, cat, price, b_name, missing, level in zip(
+                names[valid].tolist(), cats[valid].tolist(), prices[valid].tolist(),
+                b_names[valid].tolist(), b_missing[valid].tolist(), levels[valid].tolist()):
+            seen_names.add(name)
+            entry = {
+                "Business Name": fallback_b_name if missing else b_name,
+                "Product Category": cat,
+                "Product Name": name,
+                "Price": price
+            }
+            valid_products.append(entry)
 
-        # Temporary lists for sorting
-        valid_rows_list = []
-        error_rows_list = []
-
-        for index, row in raw_df.iterrows():
-            cat = str(row.get('Product Category', ''))
-            name = str(row.get('Product Name', ''))
-            raw_price = row.get('Price', 0)
-
-            try:
-                price = float(raw_price)
-            except:
-                price = 0.0
-
-            rejection_reason = None
-            if price <= 0 or pd.isna(raw_price): rejection_reason = "Price <= 0"
-            elif not cat or cat == 'NAN': rejection_reason = "Invalid Category"
-            elif not name or name == 'NAN': rejection_reason = "Invalid Name"
-            elif name in seen_names: rejection_reason = "Duplicate Name"
-
-            # Construct row dict for reconstruction
-            row_dict = row.to_dict()
-
-            if rejection_reason is None:
-                seen_names.add(name)
-
-                # Ensure Business Name is populated in memory even if empty in file row
-                raw_b_name = str(row.get('Business Name', ''))
-                if not raw_b_name or raw_b_name.lower() == 'nan':
-                    b_name = self.business_name
-                else:
-                    b_name = raw_b_name
+            level = self._parse_reorder_level(level)
+            if level is not None:
+                reorder_levels[name] = level
 
-                entry = {
-                    "Business Name": b_name,
-                    "Product Category": cat,
-                    "Product Name": name,
-                    "Price": price
-                }
-                valid_products.append(entry)
+            # Populate Lookup Cache
+            lookup[name] = entry
+            truncated = truncate_product_name(name)
+            lookup[truncated] = entry
 
-                # Populate Lookup Cache
-                self.name_lookup_cache[name] = entry
-                truncated = truncate_product_name(name)
-                self.name_lookup_cache[truncated] = entry
-
-                # Clear remarks
-                row_dict['Remarks'] = ""
-                valid_rows_list.append(row_dict)
-            else:
-                rejected_details.append({"name": name, "reason": rejection_reason})
-                row_dict['Remarks'] = rejection_reason
-                error_rows_list.append(row_dict)
+        for name, reason in zip(names[~valid].tolist(), reasons[~valid].tolist()):
+            rejected_details.append({"name": name, "reason": reason})
 
         # Sort Logic: Errors first, then valid. Both sorted by Category -> Name
-        def sort_helper(r):
-            return (str(r.get('Product Category', '')), str(r.get('Product Name', '')))
-
-        error_rows_list.sort(key=sort_helper)
-        valid_rows_list.sort(key=sort_helper)
-
-        final_rows = error_rows_list + valid_rows_list
-        raw_df = pd.DataFrame(final_rows)
+        sort_keys = list(zip(cats.tolist(), names.tolist()))
+        is_valid = valid.tolist()
+        order = sorted(range(len(raw_df)), key=lambda i: (is_valid[i], sort_keys[i]))
+        raw_df = raw_df.iloc[order].reset_index(drop=True) if order else pd.DataFrame()
 
+        sheet_normalized = False  # products.xlsx on disk now holds the cleaned sheet
         try:
             # Ensure column order matches standard
             if not raw_df.empty:
-                cols = ["Business Name", "Product Category", "Product Name", "Price", "Remarks"]
+                cols = ["Business Name", "Product Category", "Product Name", "Price", "Reorder Level", "Remarks"]
+                if "Reorder Level" not in raw_df.columns:
+                    cols.remove("Reorder Level")  # Optional; not added to sheets without it
                 # Keep other columns if they exist
                 existing_cols = [c for c in raw_df.columns if c not in cols]
                 final_cols = cols + existing_cols
@@ -382,138 +2309,684 @@ class DataManager:
             if "Business Name" in raw_df.columns:
                 raw_df["Business Name"] = ""
                 if not raw_df.empty:
-                    raw_df.at[0, "Business Name"] = self.business_name
+                    raw_df.at[0, "Business Name"] = business_name or self.business_name
 
-            raw_df.to_excel(DATA_FILE, index=False)
+            if sheet_cells(raw_df) != as_read:
+                self._write_products_sheet(raw_df)
+            sheet_normalized = True
 
-            # Post-processing: Apply Number Format
-            import openpyxl
-            wb = openpyxl.load_workbook(DATA_FILE)
-            ws = wb.active
+        except Exception as e:
+            print(f"Failed to update products.xlsx: {e}")
 
-            # Find Price column index (1-based)
-            price_col_idx = None
-            for idx, cell in enumerate(ws[1], 1):
-                if cell.value and str(cell.value).strip() == "Price":
-                    price_col_idx = idx
-                    break
+        # --- Smart Display Name Resolution ---
+        self.resolve_display_names(valid_products)
 
-            if price_col_idx:
+        # Populate Display Name Map (Full Name -> Smart Name); display names also look up
+        display_names = {}
+        for p in valid_products:
+            if '_display_name' in p:
+                display_names[p['Product Name']] = p['_display_name']
+                lookup[p['_display_name']] = p
+
+        return {
+            "business_name": business_name,
+            "products": valid_products,
+            "lookup": lookup,
+            "display_names": display_names,
+            "reorder_levels": reorder_levels,
+            "rejected_details": rejected_details,
+            "cleaned_names": cleaned_count,
+            "sheet_normalized": sheet_normalized
+        }
+
+    def _write_products_sheet(self, df) -> None:
+        """Writes the normalized catalog back to products.xlsx in one openpyxl pass, Price as 0.00."""
+        pd = self.mod.pd
+        with pd.ExcelWriter(DATA_FILE, engine="openpyxl") as writer:
+            df.to_excel(writer, index=False)
+            ws = next(iter(writer.sheets.values()))
+
+            # Apply Number Format to the Price column (1-based index)
+            if "Price" in df.columns:
+                price_col_idx = list(df.columns).index("Price") + 1
                 for row in ws.iter_rows(min_row=2, min_col=price_col_idx, max_col=price_col_idx):
                     for cell in row:
                         cell.number_format = '0.00'
 
-            wb.save(DATA_FILE)
+    # --- Catalog Cache ---
+    def _catalog_fingerprint(self, digest: bool = True) -> Optional[Tuple]:
+        """(size, mtime, sha256) of products.xlsx; None if it cannot be read."""
+        try:
+            st = os.stat(DATA_FILE)
+            if not digest:
+                return st.st_size, st.st_mtime_ns
+            with open(DATA_FILE, 'rb') as f:
+                return st.st_size, st.st_mtime_ns, hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
 
+    def _load_catalog_cache(self) -> Optional[Dict]:
+        """The cached catalog if products.xlsx is byte-for-byte the file it was parsed from, else None."""
+        try:
+            with open(CATALOG_CACHE_FILE, 'rb') as f:
+                data = pickle.load(f)
+            if data.get("version") != self.CATALOG_CACHE_VERSION:
+                return None
+            # Size and mtime first; only a likely match is hashed
+            if data["fingerprint"][:2] != self._catalog_fingerprint(digest=False):
+                return None
+            if data["fingerprint"] != self._catalog_fingerprint():
+                return None
+            return data["catalog"]
+        except FileNotFoundError:
+            return None
         except Exception as e:
-            print(f"Failed to update products.xlsx: {e}")
+            print(f"Catalog Cache Error: {e}")
+            return None
 
-        # --- Smart Display Name Resolution ---
-        self.resolve_display_names(valid_products)
+    def _save_catalog_cache(self, catalog: Dict) -> None:
+        """Caches a freshly parsed catalog against products.xlsx, once the cleaned sheet is on disk."""
+        fingerprint = self._catalog_fingerprint()
+        if fingerprint is None:
+            return
+        # Names in the file are already cleaned, so re-reading it would clean none
+        cached = dict(catalog, cleaned_names=0)
+        try:
+            temp_file = CATALOG_CACHE_FILE + ".tmp"
+            with open(temp_file, 'wb') as f:
+                pickle.dump({"version": self.CATALOG_CACHE_VERSION, "fingerprint": fingerprint,
+                             "catalog": cached}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_file, CATALOG_CACHE_FILE)
+        except Exception as e:
+            print(f"Catalog Cache Error: {e}")
 
-        # Populate Display Name Map (Full Name -> Smart Name)
-        self.display_name_map = {}
-        for p in valid_products:
-            if '_display_name' in p:
-                self.display_name_map[p['Product Name']] = p['_display_name']
+    def add_transaction(self, t_type: str, filename: str, items: List[Dict],
+                        timestamp: Optional[str] = None, ref_type: str = None,
+                        ref_filename: str = None, on_durable=None) -> None:
+        """
+        Records a transaction in memory at once; on_durable(error) is called on the
+        Tk thread once it has reached disk (error is None on success).
+        """
+        if not timestamp:
+            timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-        self.products_df = pd.DataFrame(valid_products)
+        transaction = {
+            "type": t_type,
+            "timestamp": timestamp,
+            "filename": filename,
+            "items": items
+        }
+        if ref_type: transaction['ref_type'] = ref_type
+        if ref_filename: transaction['ref_filename'] = ref_filename
+
+        with self._data_lock:  # A background summary may be reading these
+            self.ledger.append(transaction)
+            self._bump_ledger_version()
+            position = self.ledger_length() - 1
+            self._index_transaction(position, transaction)
+            if not self.store:
+                self.partitions.note_append(transaction)
+                self._rollup_transaction(position)
+            alerts_changed = self._apply_stock_delta(position, alerts=True)
+            if self._velocity is not None:
+                dt = parse_ledger_timestamp(timestamp, self.date_fmt)
+                if dt is not None:
+                    self._add_velocity(position, naive_epoch(dt))
+
+        if self.store:
+            self._persist(lambda: self.store.append(transaction), callback=on_durable)
+        elif self.config.get("ledger_journal", True):
+            self._append_journal(transaction, on_durable)
+            if self._journal_count >= self.JOURNAL_COMPACT_THRESHOLD:
+                self.save_ledger()
+        else:
+            self.save_ledger(on_durable)
+        self.create_rolling_backup()
+        if alerts_changed and self.alert_listener:
+            self.alert_listener()
+        if self.config.get("debug_stock_check", False):
+            self.verify_stock_cache()
+
+    def replace_ledger(self, transactions: List[Dict]) -> None:
+        """Swaps in a whole new transaction history (restore, load test)."""
+        self.flush_writes()  # Queued appends belong to the history being replaced
+        with self._data_lock:
+            self._bump_ledger_version()
+            self.ledger = transactions if isinstance(transactions, ColumnarLedger) else ColumnarLedger(transactions)
+            self._ledger_base = 0
+            self._loaded_from = 0
+            self._velocity = None
+            self._rebuild_ts_index()
+            if not self.store:
+                self.partitions.reset(transactions)
+                self._rebuild_rollups()
+            self._clear_stock_checkpoints()  # Positions no longer refer to the same history
+            self._clear_closed_days()  # Frozen totals belong to the replaced history
+        if self.store:
+            try:
+                self.store.replace_all(transactions)
+            except Exception as e:
+                messagebox.showerror("Save Error", f"Could not save database: {e}")
+
+    def get_transactions_for_day(self, t_type: str, day_str: str) -> List[Dict]:
+        """Transactions of the given type recorded on 'YYYY-MM-DD'."""
+        if self.store:
+            self.flush_writes()
+            return self.store.transactions_for_day(t_type, day_str)
+
+        try:
+            day = datetime.datetime.strptime(day_str, "%Y-%m-%d")
+            positions = self._positions_in_range(naive_epoch(day), naive_epoch(day.replace(hour=23, minute=59, second=59)))
+        except ValueError:
+            positions = []
+        positions = sorted(set(positions + self._malformed_positions()))
+        transactions = [self._txn(pos) for pos in positions]
+        return [t for t in transactions
+                if t.get('type') == t_type and str(t.get('timestamp', '')).startswith(day_str)]
+
+    def get_ledger_export_path(self) -> str:
+        """
+        Returns a self-contained ledger file (all partitions, or the SQLite store) for
+        email attachments: ledger.jsonl.gz when compression is on, else ledger.json.
+        Either restores through Restore. Cold partitions are streamed to the file, not loaded.
+        """
+        meta = {
+            "summary_count": self.summary_count,
+            "shortcuts_asked": self.shortcuts_asked,
+            "product_history": self.product_history
+        }
+        if self.config.get("ledger_compression", False):
+            try:
+                write_ledger_jsonl(LEDGER_EXPORT_GZ_FILE, self._iter_all_transactions(), meta)
+            except Exception as e:
+                print(f"Ledger Export Error: {e}")
+            return LEDGER_EXPORT_GZ_FILE
+
+        try:
+            # Written one transaction at a time, so cold partitions are never held in memory
+            temp_file = LEDGER_EXPORT_FILE + ".tmp"
+            with open(temp_file, 'w') as f:
+                f.write('{"transactions": [')
+                for i, transaction in enumerate(self._iter_all_transactions()):
+                    f.write((",\n" if i else "\n") + json.dumps(transaction))
+                f.write("\n]")
+                for key, value in meta.items():
+                    f.write(f", {json.dumps(key)}: {json.dumps(value)}")
+                f.write("}")
+            os.replace(temp_file, LEDGER_EXPORT_FILE)
+        except Exception as e:
+            print(f"Ledger Export Error: {e}")
+        return LEDGER_EXPORT_FILE
+
+    def refresh_stock_cache(self) -> None:
+        """
+        Full rebuild of the stock cache; only needed at load, restore or load test.
+        Uses a stock-only stats pass, so daily rollups (or SQL) supply the totals
+        without replaying every line item or reading cold partitions.
+        """
+        with self._data_lock:
+            self._bump_ledger_version()
+            stats, _, _, _ = self._compute_stats(None, stock_only=True)
+            self.stock_cache = {name: {'name': name, 'in': entry['in'], 'out': entry['out']}
+                                for name, entry in stats.items()}
+            self._refresh_low_stock()
+
+    def load_stock_cache(self) -> None:
+        """
+        Startup path: restores stock from the newest valid checkpoint and replays
+        only the transactions recorded after it, falling back to a full rebuild.
+        """
+        for checkpoint in reversed(self._read_stock_checkpoints()):
+            try:
+                position = int(checkpoint["position"])
+                if not 0 <= position <= self.ledger_length(): continue
+                if checkpoint.get("fingerprint") != self._ledger_fingerprint(position): continue
+
+                self.stock_cache = {name: {'name': name, 'in': int(v['in']), 'out': int(v['out'])}
+                                    for name, v in checkpoint["stock"].items()}
+                for pos in range(position, self.ledger_length()):
+                    self._apply_stock_delta(pos)
+                self._refresh_low_stock()
+                return
+            except Exception:
+                continue
+
+        self.refresh_stock_cache()
+        if not self.store and self._loaded_from == 0 and len(self.partitions.parts) > 1:
+            self.write_stock_checkpoint()  # Lets the next startup leave cold partitions on disk
+
+    def _read_stock_checkpoints(self) -> List[Dict]:
+        try:
+            with open(STOCK_CHECKPOINT_FILE, 'r') as f:
+                data = json.load(f)
+            return data.get("checkpoints", [])
+        except Exception:
+            return []
+
+    def write_stock_checkpoint(self) -> None:
+        """Persists current stock levels together with the ledger position they cover."""
+        position = self.ledger_length()
+        checkpoint = {
+            "timestamp": datetime.datetime.now().strftime(self.date_fmt),
+            "position": position,
+            "fingerprint": self._ledger_fingerprint(position),
+            "stock": {name: {'in': v['in'], 'out': v['out']} for name, v in self.stock_cache.items()}
+        }
+        checkpoints = [c for c in self._read_stock_checkpoints() if c.get("position", 0) <= position]
+        checkpoints.append(checkpoint)
+        checkpoints = checkpoints[-self.STOCK_CHECKPOINTS_KEPT:]
+
+        try:
+            temp_file = STOCK_CHECKPOINT_FILE + ".tmp"
+            with open(temp_file, 'w') as f:
+                json.dump({"checkpoints": checkpoints}, f)
+            os.replace(temp_file, STOCK_CHECKPOINT_FILE)
+        except Exception as e:
+            print(f"Stock Checkpoint Error: {e}")
+
+    def _clear_stock_checkpoints(self) -> None:
+        try:
+            if os.path.exists(STOCK_CHECKPOINT_FILE):
+                os.remove(STOCK_CHECKPOINT_FILE)
+        except Exception as e:
+            print(f"Stock Checkpoint Error: {e}")
+
+    def _apply_stock_delta(self, pos: int, alerts: bool = False) -> bool:
+        """
+        Updates the stock cache in place from the items of the transaction at a ledger position.
+        With alerts, checks each changed product against its reorder level; True if low_stock changed.
+        """
+        idx = self._local(pos)
+        t_type, ref_type = self.ledger.types(idx)
+        if not t_type: return False
+
+        changed = False
+        try:
+            # lines() converts qty and price, so lines with a bad price are rejected as in calculate_stats
+            for name, qty, _, _ in self.ledger.lines(idx):
+                if name not in self.stock_cache:
+                    self.stock_cache[name] = {'name': name, 'in': 0, 'out': 0}
+                entry = self.stock_cache[name]
+                before = entry['in'] - entry['out']
+
+                if t_type == 'sales' or (t_type == 'correction' and ref_type == 'sales'):
+                    entry['out'] += qty
+                elif t_type == 'inventory' or (t_type == 'correction' and ref_type == 'inventory'):
+                    entry['in'] += qty
+
+                if alerts and name in self.reorder_levels:
+                    changed = self._check_reorder_level(name, before) or changed
+        except Exception:
+            pass  # Same as calculate_stats: a bad line skips the rest of its transaction
+        return changed
+
+    # --- Low-Stock Alerts ---
+    @staticmethod
+    def _parse_reorder_level(value: Any) -> Optional[int]:
+        """A "Reorder Level" cell as a whole number of units; None when blank or invalid."""
+        try:
+            level = float(value)
+        except (TypeError, ValueError):
+            return None
+        if math.isnan(level) or level < 0:
+            return None
+        return int(level)
+
+    def _check_reorder_level(self, name: str, before: int) -> bool:
+        """Fires or clears the alert for a product whose stock moved from `before`; True if low_stock changed."""
+        level = self.reorder_levels[name]
+        stock = self.get_stock_level(name)
+        if stock <= level < before:
+            alert = {'name': name, 'stock': stock, 'level': level,
+                     'time': datetime.datetime.now().strftime(self.date_fmt)}
+            self.low_stock[name] = alert
+            self._digest_pending[name] = alert
+            return True
+        if before <= level < stock:
+            self.low_stock.pop(name, None)
+            self._digest_pending.pop(name, None)
+            return True
+        if name in self.low_stock and stock != before:
+            self.low_stock[name]['stock'] = stock
+            return True
+        return False
 
-        # --- Product History Versioning ---
-        current_list = self.products_df.to_dict('records')
+    def _refresh_low_stock(self) -> None:
+        """
+        Recomputes low_stock after reorder levels or the whole stock cache changed (not per sale).
+        Products found low here are shown but not emailed; digests carry threshold crossings.
+        """
+        low = {}
+        now = datetime.datetime.now().strftime(self.date_fmt)
+        for name, level in self.reorder_levels.items():
+            stock = self.get_stock_level(name)
+            if stock <= level:
+                alert = self.low_stock.get(name) or {'name': name, 'level': level, 'time': now}
+                alert.update(stock=stock, level=level)
+                low[name] = alert
+        self.low_stock = low
+        self._digest_pending = {name: alert for name, alert in self._digest_pending.items() if name in low}
+        if self.alert_listener:
+            self.alert_listener()
+
+    def take_alert_digest(self) -> List[Dict]:
+        """Alerts fired since the last digest whose products are still low; clears the batch."""
+        with self._data_lock:
+            alerts = [self.low_stock[name] for name in self._digest_pending if name in self.low_stock]
+            self._digest_pending = {}
+            return alerts
+
+    def verify_stock_cache(self) -> bool:
+        """Debug check: compares the incremental stock cache with a full recalculation."""
+        full_stats, _, _, _ = self._compute_stats(None, stock_only=True)
+        ok = True
+        for name in set(full_stats) | set(self.stock_cache):
+            expected = full_stats.get(name, {'in': 0, 'out': 0})
+            actual = self.stock_cache.get(name, {'in': 0, 'out': 0})
+            if expected['in'] != actual['in'] or expected['out'] != actual['out']:
+                print(f"Stock Cache Mismatch: {name} cache={actual['in']}/{actual['out']} "
+                      f"full={expected['in']}/{expected['out']}")
+                ok = False
+        return ok
+
+    # --- Memoization ---
+    def _bump_ledger_version(self) -> None:
+        self.ledger_version += 1
+        self._stats_cache.clear()
+
+    def _newest_epoch(self) -> Optional[float]:
+        """Latest well-formed timestamp in the whole history (cold partitions via the manifest)."""
+        newest = self._ts_epochs[-1] if self._ts_epochs else None
+        for part in self.partitions.parts[:self._loaded_from]:
+            if part.get("max_epoch") is not None and (newest is None or part["max_epoch"] > newest):
+                newest = part["max_epoch"]
+        return newest
+
+    def _period_key(self, period_filter) -> Tuple:
+        """
+        Cache key for a period. An end at or after the newest transaction selects the same
+        rows whatever its exact value, so "up to now" views share one entry until the next change,
+        as long as they also cover the same closed days (which are summed from their frozen totals).
+        """
+        if not period_filter:
+            return (None,)
+        start, end = period_filter
+        now_inside = start <= datetime.datetime.now() <= end  # Malformed timestamps count as "now"
+        newest = self._newest_epoch()
+        open_ended = newest is None or naive_epoch(end) >= newest
+        if not open_ended:
+            return (start, end, now_inside)
+        # The end only decides which closed days the period covers whole: up to the last one
+        last_whole = (end + datetime.timedelta(seconds=1) - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+        last_closed = max((k for k in self.closed_days if k <= last_whole), default=None)
+        return (start, None, now_inside, last_closed)
+
+    def _memoized(self, key: Tuple, compute):
+        """LRU lookup keyed on (key, ledger_version); results are shared, so callers must not mutate them."""
+        result = self._memo_get(key)
+        if result is None:
+            result = compute()
+            self._memo_put(key, self.ledger_version, result)
+        return result
+
+    def _memo_get(self, key: Tuple) -> Any:
+        """The memoized result for key at the current ledger_version, or None."""
+        key = key + (self.ledger_version,)
+        if key in self._stats_cache:
+            self._stats_cache.move_to_end(key)
+            return self._stats_cache[key]
+        return None
 
-        should_save_history = False
-        if not self.product_history:
-            should_save_history = True
-        else:
-            # Compare with latest
-            # Simple check: json dumps comparison to ensure deep equality including order if sorted,
-            # but list order matters in excel, so direct comparison is fine.
-            # However, we must ensure we are comparing compatible structures.
-            # 'records' gives list of dicts.
-            last_version = self.product_history[-1].get('items', [])
-            if current_list != last_version:
-                should_save_history = True
+    def _memo_put(self, key: Tuple, version: int, result: Any) -> None:
+        """Stores a result computed at ledger_version `version`; dropped if the ledger has moved on since."""
+        if version != self.ledger_version:
+            return
+        self._stats_cache[key + (version,)] = result
+        while len(self._stats_cache) > self.STATS_CACHE_SIZE:
+            self._stats_cache.popitem(last=False)
+
+    def calculate_stats(self, period_filter: Optional[Tuple[datetime.datetime, datetime.datetime]],
+                        stock_only: bool = False) -> Tuple[Dict, int, int, List[str]]:
+        """Memoized per period and ledger version; see _compute_stats."""
+        with self._data_lock:
+            return self._memoized(("stats", stock_only) + self._period_key(period_filter),
+                                  lambda: self._compute_stats(period_filter, stock_only))
+
+    def calculate_stats_multi(self, intervals: List[Tuple[datetime.datetime, datetime.datetime]],
+                              stock_only: bool = False) -> List[Tuple[Dict, int, int, List[str]]]:
+        """
+        calculate_stats(interval) for each of several chronological, non-overlapping
+        intervals (touching ends allowed), bucketing transactions in one sorted sweep
+        over the timestamp index (one grouped query on the SQLite store) instead of
+        one aggregation per interval.
+        """
+        with self._data_lock:
+            if self.store:
+                self.flush_writes()
+                if self.closed_days:
+                    return [self._compute_stats(interval, stock_only) for interval in intervals]
+                return self.store.calculate_stats_multi(intervals, stock_only)
+
+            results = []
+            for (start, end), bucket in zip(intervals, self._bucket_positions(intervals)):
+                # Whole closed days come from their frozen totals, as in _compute_stats
+                segments = self._closed_segments(start, end)
+                seg_starts = [naive_epoch(seg[1]) if seg[0] == "live"
+                              else naive_epoch(datetime.datetime.strptime(seg[1], "%Y-%m-%d")) for seg in segments]
+                seg_positions = [[] for _ in segments]
+                for epoch, pos in bucket:
+                    seg_positions[max(0, bisect.bisect_right(seg_starts, epoch) - 1)].append(pos)
+
+                stats, in_count, out_count, corrections = {}, 0, 0, []  # (ledger position, filename)
+                for seg, positions in zip(segments, seg_positions):
+                    if seg[0] == "closed":
+                        seg_in, seg_out, seg_corrections = self._add_closed_day(stats, seg[1], stock_only)
+                        corrections.extend(seg_corrections)
+                    else:
+                        seg_in, seg_out = self._aggregate_positions(positions, stats, corrections, stock_only)
+                    in_count += seg_in
+                    out_count += seg_out
+                corrections.sort()
+                results.append((stats, in_count, out_count, [fname for _, fname in corrections]))
+            return results
+
+    def _bucket_positions(self, intervals: List[Tuple[datetime.datetime, datetime.datetime]]) \
+            -> List[List[Tuple[float, int]]]:
+        """
+        (epoch, ledger position) pairs per interval, in ledger order. A timestamp on a shared
+        boundary falls in both intervals and malformed timestamps count as "now", as with
+        separate _positions_in_period calls.
+        """
+        buckets = [[] for _ in intervals]
+        if not intervals:
+            return buckets
+        starts = [naive_epoch(s) for s, _ in intervals]
+        ends = [naive_epoch(e) for _, e in intervals]
+
+        self._ensure_range_loaded(min(starts), max(ends))
+        lo = bisect.bisect_left(self._ts_epochs, min(starts))
+        hi = bisect.bisect_right(self._ts_epochs, max(ends))
+
+        first = 0  # Earliest interval not yet ended; epochs arrive in ascending order
+        for epoch, pos in zip(self._ts_epochs[lo:hi], self._ts_positions[lo:hi]):
+            while first < len(intervals) and ends[first] < epoch:
+                first += 1
+            i = first
+            while i < len(intervals) and starts[i] <= epoch:
+                if epoch <= ends[i]:
+                    buckets[i].append((epoch, pos))
+                i += 1
 
-        if should_save_history and current_list:
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.product_history.append({
-                "timestamp": timestamp,
-                "items": current_list
-            })
-            # Keep only last 4 versions (Current + 3 past)
-            if len(self.product_history) > 4:
-                self.product_history = self.product_history[-4:]
-            self.save_ledger()
+        now = datetime.datetime.now()
+        for bucket, (start, end) in zip(buckets, intervals):
+            if start <= now <= end:
+                bucket.extend((naive_epoch(now), pos) for pos in self._malformed_positions())
+            bucket.sort(key=lambda pair: pair[1])
+        return buckets
+
+    def _compute_stats(self, period_filter: Optional[Tuple[datetime.datetime, datetime.datetime]],
+                       stock_only: bool = False) -> Tuple[Dict, int, int, List[str]]:
+        """
+        Stats for a period: whole closed days from their frozen totals, the rest live
+        (see _compute_live_stats). Corrections are merged by ledger position, so the list
+        keeps ledger order whichever days are closed.
+        """
+        if not period_filter or not self.closed_days:
+            return self._compute_live_stats(period_filter, stock_only)
+        segments = self._closed_segments(*period_filter)
+        if len(segments) == 1 and segments[0][0] == "live":
+            return self._compute_live_stats(period_filter, stock_only)
+
+        stats, in_count, out_count, corrections = {}, 0, 0, []  # (ledger position, filename)
+        for seg in segments:
+            if seg[0] == "closed":
+                seg_in, seg_out, seg_corrections = self._add_closed_day(stats, seg[1], stock_only)
+            else:
+                part, seg_in, seg_out, _ = self._compute_live_stats((seg[1], seg[2]), stock_only)
+                seg_corrections = self._correction_positions(seg[1], seg[2])
+                for name, entry in part.items():
+                    target = stats.get(name)
+                    if target is None:
+                        target = stats[name] = new_stats_entry(name, stock_only)
+                    target['in'] += entry['in']
+                    target['out'] += entry['out']
+                    if not stock_only:
+                        for price, cell in entry['prices'].items():
+                            total = price_cell(target, price, cell['first'])
+                            total['in'] += cell['in']
+                            total['out'] += cell['out']
+                            total['sales'] += cell['sales']
+            in_count += seg_in
+            out_count += seg_out
+            corrections.extend(seg_corrections)
+        corrections.sort()
+        return stats, in_count, out_count, [fname for _, fname in corrections]
+
+    def _correction_positions(self, start: datetime.datetime, end: datetime.datetime) -> List[Tuple[int, str]]:
+        """(ledger position, filename) of the corrections in a period, in ledger order (ids on the SQLite store)."""
+        if self.store:
+            self.flush_writes()
+            return self.store.correction_positions((start, end))
+        day_keys, positions = self._split_period(start, end)
+        corrections = [tuple(c) for day_key in day_keys for c in self.rollups[day_key]["corrections"]]
+        for pos in positions:
+            idx = self._local(pos)
+            if self.ledger.get(idx, 'type') == 'correction':
+                corrections.append((pos, self.ledger.get(idx, 'filename', 'Unknown')))
+        corrections.sort()
+        return corrections
+
+    def _compute_live_stats(self, period_filter: Optional[Tuple[datetime.datetime, datetime.datetime]],
+                            stock_only: bool = False) -> Tuple[Dict, int, int, List[str]]:
+        """
+        Calculates inventory stats: per product {'name', 'in', 'out', 'prices'}, where
+        'prices' maps each price point to running {'in', 'out', 'sales'} totals (see price_cell).
+        stock_only leaves out 'prices' (all-time stock needs only the totals).
+        Whole days are summed from the daily rollups; only partial edge days (and
+        malformed timestamps) are aggregated from raw transactions via the timestamp index.
+        """
+        if self.store:
+            self.flush_writes()
+            return self.store.calculate_stats(period_filter, stock_only)
+        # All-time stats (e.g. the startup stock refresh) come from the rollups, which never
+        # need the cold partitions; the vectorized engine is for bounded periods
+        if period_filter and self.config.get("stats_engine") == "vectorized" \
+                and self.mod.pd is not None and self.mod.np is not None:
+            result = self._calculate_stats_vectorized(period_filter, stock_only)
+            if result is not None:
+                return result
 
-        # Stats
-        previous_products = set(self.config.get("previous_products", []))
-        current_products = set(seen_names)
-        self.startup_stats = {
-            "total": len(valid_products),
-            "new": len(current_products - previous_products),
-            "rejected": len(rejected_details),
-            "phased_out": len(previous_products - current_products),
-            "rejected_details": rejected_details,
-            "cleaned_names": cleaned_count
-        }
-        self.config["previous_products"] = list(seen_names)
-        self.save_config()
+        stats = {}
+        corrections = []  # (ledger position, filename) so the list stays in ledger order
 
-    def add_transaction(self, t_type: str, filename: str, items: List[Dict],
-                        timestamp: Optional[str] = None, ref_type: str = None,
-                        ref_filename: str = None) -> None:
-        if not timestamp:
-            timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if period_filter:
+            day_keys, live_positions = self._split_period(*period_filter)
+        else:
+            day_keys, live_positions = list(self.rollups.keys()), self._malformed_positions()
+
+        in_count, out_count = self._aggregate_positions(live_positions, stats, corrections, stock_only)
+
+        for day_key in day_keys:
+            day = self.rollups[day_key]
+            in_count += day["in_count"]
+            out_count += day["out_count"]
+            corrections.extend(tuple(c) for c in day["corrections"])
+
+            for name, prices in day["items"].items():
+                entry = stats.get(name)
+                if entry is None:
+                    entry = stats[name] = new_stats_entry(name, stock_only)
+                for price, (qty_in, qty_out, amt, has_in, has_sales, first) in prices.items():
+                    entry['in'] += qty_in
+                    entry['out'] += qty_out
+                    if not stock_only and (has_in or has_sales):
+                        cell = price_cell(entry, price, tuple(first))
+                        cell['in'] += qty_in
+                        cell['out'] += qty_out
+                        cell['sales'] += amt
 
-        transaction = {
-            "type": t_type,
-            "timestamp": timestamp,
-            "filename": filename,
-            "items": items
-        }
-        if ref_type: transaction['ref_type'] = ref_type
-        if ref_filename: transaction['ref_filename'] = ref_filename
+        corrections_in_period = []
+        if period_filter:
+            corrections.sort()
+            corrections_in_period = [fname for _, fname in corrections]
 
-        self.create_rolling_backup()
-        self.ledger.append(transaction)
-        self.save_ledger()
-        self.refresh_stock_cache()
+        return stats, in_count, out_count, corrections_in_period
 
-    def refresh_stock_cache(self) -> None:
-        self.stock_cache, _, _, _ = self.calculate_stats(None)
+    def _ensure_period_loaded(self, period_filter: Tuple[datetime.datetime, datetime.datetime]) -> None:
+        """Loads every cold partition with a transaction the (bounded) period could select."""
+        start, end = period_filter
+        self._ensure_range_loaded(naive_epoch(start), naive_epoch(end))
+        if start <= datetime.datetime.now() <= end:
+            self._malformed_positions()
 
-    def calculate_stats(self, period_filter: Optional[Tuple[datetime.datetime, datetime.datetime]]) \
-            -> Tuple[Dict, int, int, List[str]]:
+    def _calculate_stats_vectorized(self, period_filter: Tuple[datetime.datetime, datetime.datetime],
+                                    stock_only: bool = False) -> Optional[Tuple[Dict, int, int, List[str]]]:
         """
-        Calculates inventory stats.
-        Optimization: We parse dates inside the loop.
+        calculate_stats for a bounded period over the flattened line-item table with grouped
+        pandas aggregation. Returns None when the table cannot represent the ledger exactly
+        (oversized quantities).
         """
-        stats = {}
+        np = self.mod.np
+        self._ensure_period_loaded(period_filter)
+
+        table = self._line_table
+        if table is None or table.ledger is not self.ledger:
+            table = self._line_table = LineItemTable(self.ledger)
+        table.sync()
+        if not table.exact:
+            return None
+
+        # Mark the timestamp-index slice for the period; malformed timestamps count as "now"
+        start, end = period_filter
+        selected = np.zeros(table.count, dtype=bool)
+        lo = bisect.bisect_left(self._ts_epochs, naive_epoch(start))
+        hi = bisect.bisect_right(self._ts_epochs, naive_epoch(end))
+        if hi > lo:
+            selected[np.array(self._ts_positions[lo:hi], dtype=np.int64) - self._ledger_base] = True
+        if start <= datetime.datetime.now() <= end and self._ts_malformed:
+            selected[np.array(self._ts_malformed, dtype=np.int64) - self._ledger_base] = True
+
+        return table.aggregate(self.mod.pd, np, selected, stock_only, self._ledger_base)
+
+    def _aggregate_positions(self, positions: List[int], stats: Dict, corrections: List[Tuple[int, str]],
+                             stock_only: bool = False) -> Tuple[int, int]:
+        """Aggregates raw transactions at the given ledger positions into stats (running per-price totals)."""
         in_count = 0
         out_count = 0
-        corrections_in_period = []
 
-        for transaction in self.ledger:
+        if positions:
+            self._local(min(positions))  # Load any cold partitions up front
+        ledger, base = self.ledger, self._ledger_base
+
+        for pos in positions:
+            idx = pos - base
             try:
                 # Type Check
-                t_type = transaction.get('type')
+                t_type, ref_type, lines = ledger.row(idx)
                 if not t_type: continue
 
-                # Filter by Period
-                if period_filter:
-                    ts_str = transaction.get('timestamp')
-                    try:
-                        dt = datetime.datetime.strptime(ts_str, self.date_fmt)
-                    except:
-                        dt = datetime.datetime.now()
-
-                    s, e = period_filter
-                    if not (s <= dt <= e):
-                        continue
-
-                    if t_type == 'correction':
-                        corrections_in_period.append(transaction.get('filename', 'Unknown'))
+                if t_type == 'correction':
+                    corrections.append((pos, ledger.get(idx, 'filename', 'Unknown')))
 
                 # Aggregate Logic
                 if t_type == 'inventory':
@@ -521,36 +2994,29 @@ class DataManager:
                 elif t_type == 'sales':
                     out_count += 1
 
-                ref_type = transaction.get('ref_type')
-
-                for item in transaction.get('items', []):
-                    name = item.get('name', 'Unknown')
-                    qty = int(item.get('qty', 0))
-                    price = float(item.get('price', 0))
-
-                    if name not in stats:
-                        stats[name] = {'name': name, 'in': 0, 'out': 0, 'sales_lines': [], 'in_lines': []}
-
-                    if t_type == 'sales':
-                        amt = float(item.get('subtotal', 0))
-                        stats[name]['out'] += qty
-                        stats[name]['sales_lines'].append({'price': price, 'qty': qty, 'amt': amt})
-                    elif t_type == 'inventory':
-                        stats[name]['in'] += qty
-                        stats[name]['in_lines'].append({'price': price, 'qty': qty})
-                    elif t_type == 'correction':
-                        if ref_type == 'sales':
-                            stats[name]['out'] += qty
-                            amt = qty * price
-                            stats[name]['sales_lines'].append({'price': price, 'qty': qty, 'amt': amt})
-                        elif ref_type == 'inventory':
-                            stats[name]['in'] += qty
-                            stats[name]['in_lines'].append({'price': price, 'qty': qty})
+                is_out = t_type == 'sales' or (t_type == 'correction' and ref_type == 'sales')
+                is_in = t_type == 'inventory' or (t_type == 'correction' and ref_type == 'inventory')
+                for line, (name, qty, price, subtotal) in enumerate(lines):
+                    entry = stats.get(name)
+                    if entry is None:
+                        entry = stats[name] = new_stats_entry(name, stock_only)
+
+                    if is_out:
+                        amt = float(subtotal) if t_type == 'sales' else qty * price
+                        entry['out'] += qty
+                        if not stock_only:
+                            cell = price_cell(entry, price, seen_key(True, pos, line))
+                            cell['out'] += qty
+                            cell['sales'] += amt
+                    elif is_in:
+                        entry['in'] += qty
+                        if not stock_only:
+                            price_cell(entry, price, seen_key(False, pos, line))['in'] += qty
 
             except Exception:
                 continue
 
-        return stats, in_count, out_count, corrections_in_period
+        return in_count, out_count
 
     def get_product_list(self) -> List[Dict]:
         if self.products_df is None or self.products_df.empty:
@@ -559,11 +3025,16 @@ class DataManager:
 
     def get_product_details_by_str(self, selection_string: str) -> Tuple[str, str, float, str]:
         """Returns (code, name, price, category)"""
+        return self._product_details(self.name_lookup_cache, selection_string)
+
+    @staticmethod
+    def _product_details(lookup: Dict[str, Dict], selection_string: str) -> Tuple[str, str, float, str]:
+        """get_product_details_by_str against a given name lookup cache (or a snapshot of it)."""
         if not selection_string: return "", None, 0, "Uncategorized"
 
         # Try direct lookup in cache (Exact Full Name or Truncated Name)
-        if selection_string in self.name_lookup_cache:
-            item = self.name_lookup_cache[selection_string]
+        if selection_string in lookup:
+            item = lookup[selection_string]
             return "", item['Product Name'], float(item['Price']), item['Product Category']
 
         # Try parsing "Name (Price)" format
@@ -572,14 +3043,490 @@ class DataManager:
         except:
             name_part = selection_string
 
-        if name_part in self.name_lookup_cache:
-            item = self.name_lookup_cache[name_part]
+        if name_part in lookup:
+            item = lookup[name_part]
             return "", item['Product Name'], float(item['Price']), item['Product Category']
 
         # Fallback for old items not in current product list but in ledger (Phased Out)
         # We rely on what was passed if possible, or return Phased Out
         return "", "Unknown Item", 0.0, "Phased Out"
 
+    def catalog_names(self) -> Set[str]:
+        """Product names in products.xlsx (as strings), computed once per catalog version."""
+        cached = self._catalog_names
+        if cached is None or cached[0] != self.catalog_version:
+            names: Set[str] = set()
+            if self.products_df is not None and 'Product Name' in self.products_df.columns:
+                names = set(self.products_df['Product Name'].astype(str))
+            cached = self._catalog_names = (self.catalog_version, names)
+        return cached[1]
+
+    def summarize(self, period: Optional[Tuple[datetime.datetime, datetime.datetime]], show_idle: bool = False,
+                  cancel: Optional[threading.Event] = None, progress=None) -> Tuple[List[Dict], int, int, List[str]]:
+        """
+        Summary rows (one per product and price point) for the Summary tab and PDFs.
+        Period movements come from a single calculate_stats pass; remaining stock comes
+        from the incremental stock cache, so the whole history is not aggregated again.
+        show_idle keeps catalog products without movement (the All Time view).
+        Memoized per period, ledger version, catalog version and hour.
+
+        Safe to call from a worker thread once prepare_period() has run on the Tk thread.
+        The data lock is only held to take the period stats and a snapshot of stock and
+        catalog, so checkouts on the Tk thread do not wait for the rows to be built.
+        Setting `cancel` raises SummaryCancelled; progress(done, total) reports products processed.
+        """
+        with self._data_lock:
+            # Days of cover decay with the clock: cached rows are reused within the hour only
+            hour = datetime.datetime.now().strftime("%Y-%m-%d %H")
+            key = ("summary", show_idle, self.catalog_version, hour) + self._period_key(period)
+            cached = self._memo_get(key)
+            if cached is not None:
+                return cached
+            version = self.ledger_version
+            period_stats, in_c, out_c, corr_list = self.calculate_stats(period)
+            snapshot = self._summary_snapshot()
+
+        products = self._summary_products(snapshot, cancel, progress)
+        result = self._summary_rows(products, period_stats, show_idle), in_c, out_c, corr_list
+
+        with self._data_lock:
+            self._memo_put(key, version, result)
+        return result
+
+    def prepare_period(self, period: Optional[Tuple[datetime.datetime, datetime.datetime]]) -> None:
+        """
+        Loads, on the calling (Tk) thread, the cold partitions a stats query for the period
+        reads, so a background summary never swaps the loaded ledger under other readers.
+        """
+        with self._data_lock:
+            self._velocity_table()  # Days of cover; may read recent cold partitions
+            if self.store:
+                return
+            if period and self.config.get("stats_engine") == "vectorized":
+                self._ensure_period_loaded(period)
+            elif period:
+                self._split_period(*period)
+            else:
+                self._malformed_positions()
+
+    def summarize_intervals(self, intervals: List[Tuple[datetime.datetime, datetime.datetime]]) \
+            -> List[Tuple[List[Dict], int, int, List[str]]]:
+        """
+        summarize(interval) for each of several chronological intervals (catchup reports).
+        Movements come from one calculate_stats_multi sweep; product details and
+        remaining stock are looked up once for all intervals.
+        """
+        with self._data_lock:
+            results = self.calculate_stats_multi(intervals)
+            products = self._summary_products(self._summary_snapshot())
+            return [(self._summary_rows(products, stats, show_idle=False), in_c, out_c, corr_list)
+                    for stats, in_c, out_c, corr_list in results]
+
+    def _summary_snapshot(self) -> Dict:
+        """
+        Copies, under the data lock, what _summary_products reads: catalog names, stock
+        levels, the name lookup cache and the sales velocity table.
+        """
+        velocity = self._velocity_table()
+        return {
+            "catalog": self.catalog_names(),  # Replaced, never mutated, per catalog version
+            "stock": {name: (st['in'] - st['out'], st['name']) for name, st in self.stock_cache.items()},
+            "lookup": dict(self.name_lookup_cache),
+            "velocity": {name: tuple(cell) for name, cell in velocity.items()},
+            "lambda": self._velocity_lambda,
+            "now": datetime.datetime.now()
+        }
+
+    def _summary_products(self, snapshot: Dict, cancel: Optional[threading.Event] = None,
+                          progress=None) -> List[Tuple]:
+        """
+        (name, display name, remaining stock, current price, category, in catalog, display name in catalog,
+        days of cover) for every catalog or stocked product; the period-independent half of a summary.
+        Reads only the snapshot, so it runs without the data lock.
+        """
+        catalog, stock, velocity = snapshot["catalog"], snapshot["stock"], snapshot["velocity"]
+
+        products = []
+        names = catalog | set(stock)
+        for done, name in enumerate(names):
+            if done % 250 == 0:
+                if cancel is not None and cancel.is_set():
+                    raise SummaryCancelled()
+                if progress:
+                    progress(done, len(names))
+            name = name.strip()
+            rem_stock = stock[name][0] if name in stock else 0
+
+            _, _, curr_price, cat = self._product_details(snapshot["lookup"], f"{name}")
+
+            display = name
+            if cat == "Phased Out" and name in stock:
+                display = stock[name][1] + " (Old)"
+
+            cover = self._cover_days(rem_stock, velocity.get(name), snapshot["lambda"], snapshot["now"])
+            products.append((name, display, rem_stock, curr_price, cat, name in catalog, display in catalog, cover))
+        return products
+
+    def _summary_rows(self, products: List[Tuple], period_stats: Dict, show_idle: bool) -> List[Dict]:
+        rows = []
+        for name, display, rem_stock, curr_price, cat, in_catalog, display_in_catalog, cover in products:
+            if not show_idle and name not in period_stats: continue  # No movement in the period
+
+            price_map = period_stats[name]['prices'] if name in period_stats else {}
+            price_rows = ordered_prices(price_map) if price_map else [(curr_price, {'in': 0, 'out': 0, 'sales': 0})]
+
+            for price, data in price_rows:
+                show_rem = rem_stock if price == curr_price else 0
+
+                # Period reports hide zero-movement rows; All Time keeps stocked or catalog items
+                if not show_idle:
+                    if data['in'] == 0 and data['out'] == 0: continue
+                elif data['in'] == 0 and data['out'] == 0 and show_rem == 0 and not in_catalog:
+                    continue
+
+                row = {
+                    'code': "", 'category': cat, 'name': display, 'price': price,
+                    'in': data['in'], 'out': data['out'], 'remaining': show_rem, 'sales': data['sales']
+                }
+                if price == curr_price:
+                    row['cover'] = cover  # Days of cover belong with the stock, on the current-price row
+                if row['in'] > 0 or row['out'] > 0 or row['remaining'] > 0 or display_in_catalog:
+                    rows.append(row)
+
+        return rows
+
+    # --- Closed Periods ---
+    def _load_closed_days(self) -> None:
+        self.closed_days = {}
+        try:
+            with open(CLOSED_DAYS_FILE, 'r') as f:
+                data = json.load(f)
+            for day_key, day in data.get("days", {}).items():
+                day["items"] = {name: {float(p): cell for p, cell in prices.items()}
+                                for name, prices in day["items"].items()}
+                self.closed_days[day_key] = day
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Closed Days Error: {e}")
+
+    def _write_closed_days(self, text: str) -> None:
+        temp_file = CLOSED_DAYS_FILE + ".tmp"
+        with open(temp_file, 'w') as f:
+            f.write(text)
+        os.replace(temp_file, CLOSED_DAYS_FILE)
+
+    def _clear_closed_days(self) -> None:
+        self.closed_days = {}
+        try:
+            if os.path.exists(CLOSED_DAYS_FILE):
+                os.remove(CLOSED_DAYS_FILE)
+        except Exception as e:
+            print(f"Closed Days Error: {e}")
+
+    def _oldest_epoch(self) -> Optional[float]:
+        """Earliest well-formed timestamp in the whole history (cold partitions via the manifest)."""
+        oldest = self._ts_epochs[0] if self._ts_epochs else None
+        for part in self.partitions.parts[:self._loaded_from]:
+            if part.get("min_epoch") is not None and (oldest is None or part["min_epoch"] < oldest):
+                oldest = part["min_epoch"]
+        return oldest
+
+    def close_periods(self, through: Optional[datetime.date] = None) -> int:
+        """
+        End-of-day close (Z-report): freezes the totals of every unclosed day up to
+        `through` (default and latest: yesterday). Stats for whole closed days read the
+        frozen totals from then on, so late backdated transactions no longer change
+        them; All Time, stock and sales curves still see every transaction.
+        Returns the number of days closed.
+        """
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+        through = min(through, yesterday) if through else yesterday
+
+        with self._data_lock:
+            oldest = self._oldest_epoch()
+            if oldest is None:
+                return 0
+            day = (_NAIVE_EPOCH + datetime.timedelta(seconds=oldest)).date()
+            if self.closed_days:
+                last_closed = datetime.datetime.strptime(max(self.closed_days), "%Y-%m-%d").date()
+                day = max(day, last_closed + datetime.timedelta(days=1))
+
+            closed_at = datetime.datetime.now().strftime(self.date_fmt)
+            count = 0
+            while day <= through:
+                day_key = day.strftime("%Y-%m-%d")
+                self.closed_days[day_key] = dict(self._day_totals(day), closed_at=closed_at)
+                day += datetime.timedelta(days=1)
+                count += 1
+            if not count:
+                return 0
+
+            self._bump_ledger_version()
+            text = json.dumps({"days": self.closed_days})
+        self._persist(lambda: self._write_closed_days(text), key="closed_days")
+        return count
+
+    def _day_totals(self, day: datetime.date) -> Dict:
+        """One day's totals in closed-day form, copied from its rollup (SQL on the SQLite store)."""
+        if not self.store:
+            rollup = self.rollups.get(day.strftime("%Y-%m-%d"))
+            if rollup is None:
+                return {"in_count": 0, "out_count": 0, "corrections": [], "items": {}}
+            return {
+                "in_count": rollup["in_count"],
+                "out_count": rollup["out_count"],
+                "corrections": sorted(list(c) for c in rollup["corrections"]),
+                "items": {name: {price: [qty_in, qty_out, amt, first]
+                                 for price, (qty_in, qty_out, amt, has_in, has_sales, first) in prices.items()
+                                 if has_in or has_sales}
+                          for name, prices in rollup["items"].items()}
+            }
+
+        start = datetime.datetime.combine(day, datetime.time())
+        end = start + datetime.timedelta(days=1) - datetime.timedelta(microseconds=1)
+        stats, in_count, out_count, _ = self._compute_live_stats((start, end))
+        return {
+            "in_count": in_count,
+            "out_count": out_count,
+            "corrections": [list(c) for c in self._correction_positions(start, end)],
+            "items": {name: {price: [cell['in'], cell['out'], cell['sales'], list(cell['first'])]
+                             for price, cell in entry['prices'].items()}
+                      for name, entry in stats.items()}
+        }
+
+    def _closed_segments(self, start: datetime.datetime, end: datetime.datetime) -> List[Tuple]:
+        """
+        Splits a period, in time order, into ("closed", day_key) for whole closed days and
+        ("live", start, end) ranges for everything else.
+        """
+        if not self.closed_days:
+            return [("live", start, end)]
+        first_key, last_key = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+        segments = []
+        cursor = start
+        for day_key in sorted(k for k in self.closed_days if first_key <= k <= last_key):
+            day_start = datetime.datetime.strptime(day_key, "%Y-%m-%d")
+            day_end = day_start + datetime.timedelta(days=1)
+            # Whole days only; timestamps have whole seconds, as in _split_period
+            if day_start < start or end < day_end - datetime.timedelta(seconds=1):
+                continue
+            if cursor < day_start:
+                segments.append(("live", cursor, day_start - datetime.timedelta(microseconds=1)))
+            segments.append(("closed", day_key))
+            cursor = day_end
+        if cursor <= end:
+            segments.append(("live", cursor, end))
+        return segments
+
+    def _add_closed_day(self, stats: Dict, day_key: str, stock_only: bool) \
+            -> Tuple[int, int, List[Tuple[int, str]]]:
+        """
+        Folds a closed day's frozen totals into stats; returns its (in_count, out_count,
+        corrections), the corrections as (ledger position, filename).
+        """
+        day = self.closed_days[day_key]
+        for name, prices in day["items"].items():
+            entry = stats.get(name)
+            if entry is None:
+                entry = stats[name] = new_stats_entry(name, stock_only)
+            for price, (qty_in, qty_out, amt, *first) in prices.items():
+                entry['in'] += qty_in
+                entry['out'] += qty_out
+                if not stock_only:
+                    cell = price_cell(entry, price, tuple(first[0]) if first else UNSEEN_KEY)
+                    cell['in'] += qty_in
+                    cell['out'] += qty_out
+                    cell['sales'] += amt
+        return day["in_count"], day["out_count"], [tuple(c) for c in day["corrections"]]
+
+    # --- Sales Buckets ---
+    def sales_by_bucket(self, start: datetime.datetime, end: datetime.datetime, bucket: str = "day",
+                        group_by: str = "product") -> Dict[datetime.datetime, Dict[str, Dict]]:
+        """
+        Sales curve between start and end (inclusive): bucket start -> product name (or
+        catalog category) -> {'qty', 'sales'}, counting sales and sales corrections like
+        calculate_stats' 'out'. Every bucket in range is present, with or without sales.
+        Whole hours/days come from the daily rollups (one grouped query on the SQLite
+        store); only partial edge hours/days read raw transactions. Malformed timestamps
+        have no time of day and are left out. Weeks start on Monday.
+        """
+        if bucket not in self.SALES_BUCKETS:
+            raise ValueError(f"Unknown bucket: {bucket}")
+        if group_by not in self.SALES_GROUPS:
+            raise ValueError(f"Unknown grouping: {group_by}")
+
+        unit = 3600 if bucket == "hour" else 86400
+        with self._data_lock:
+            if self.store:
+                self.flush_writes()
+                units = self.store.sales_by_unit(naive_epoch(start), naive_epoch(end), unit)
+            else:
+                units = self._sales_by_unit(start, end, unit)
+
+            result = {}
+            b = self._bucket_start(start, bucket)
+            while b <= end:
+                result[b] = {}
+                b += self.SALES_BUCKETS[bucket]
+
+            categories = {}
+            for epoch in sorted(units):
+                cells = result[self._bucket_start(_NAIVE_EPOCH + datetime.timedelta(seconds=epoch), bucket)]
+                for name, (qty, amt) in units[epoch].items():
+                    key = name
+                    if group_by == "category":
+                        key = categories.get(name)
+                        if key is None:
+                            key = categories[name] = self.get_product_details_by_str(f"{name}")[3]
+                    cell = cells.setdefault(key, {'qty': 0, 'sales': 0.0})
+                    cell['qty'] += qty
+                    cell['sales'] += amt
+            return result
+
+    @staticmethod
+    def _bucket_start(dt: datetime.datetime, bucket: str) -> datetime.datetime:
+        if bucket == "hour":
+            return dt.replace(minute=0, second=0, microsecond=0)
+        day = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+        if bucket == "week":
+            day -= datetime.timedelta(days=day.weekday())
+        return day
+
+    def _sales_by_unit(self, start: datetime.datetime, end: datetime.datetime, unit: int) -> Dict[float, Dict[str, List]]:
+        """Sold [qty, sales] per product, keyed by the epoch of each hour (unit=3600) or day (unit=86400)."""
+        lo, hi = naive_epoch(start), naive_epoch(end)
+        units = {}
+
+        # Units wholly inside [start, end] are [first, last); timestamps have whole seconds
+        first = -(-lo // unit) * unit
+        last = (int(hi) + 1) // unit * unit
+        if first >= last:
+            self._add_raw_sales(lo, hi, True, unit, units)
+            return units
+        self._add_raw_sales(lo, first, False, unit, units)
+        self._add_raw_sales(last, hi, True, unit, units)
+
+        first_key = (_NAIVE_EPOCH + datetime.timedelta(seconds=first)).strftime("%Y-%m-%d")
+        last_key = (_NAIVE_EPOCH + datetime.timedelta(seconds=last - 1)).strftime("%Y-%m-%d")
+        for day_key, day in self.rollups.items():
+            if not first_key <= day_key <= last_key: continue
+            day_epoch = naive_epoch(datetime.datetime.strptime(day_key, "%Y-%m-%d"))
+
+            if unit == 86400:
+                sold = units.setdefault(day_epoch, {})
+                for name, prices in day["items"].items():
+                    for _, qty_out, amt, _, has_sales, _ in prices.values():
+                        if has_sales:
+                            cell = sold.setdefault(name, [0, 0.0])
+                            cell[0] += qty_out
+                            cell[1] += amt
+                continue
+
+            for hour, hour_sold in day["hours"].items():
+                epoch = day_epoch + int(hour) * 3600
+                if not first <= epoch < last: continue
+                sold = units.setdefault(epoch, {})
+                for name, (qty, amt) in hour_sold.items():
+                    cell = sold.setdefault(name, [0, 0.0])
+                    cell[0] += qty
+                    cell[1] += amt
+        return units
+
+    def _add_raw_sales(self, lo: float, hi: float, hi_inclusive: bool, unit: int, units: Dict) -> None:
+        """Folds sold quantities of transactions with lo <= epoch < hi (or <= hi) into units, per calculate_stats rules."""
+        self._ensure_range_loaded(lo, hi)
+        a = bisect.bisect_left(self._ts_epochs, lo)
+        b = bisect.bisect_right(self._ts_epochs, hi) if hi_inclusive else bisect.bisect_left(self._ts_epochs, hi)
+        ledger, base = self.ledger, self._ledger_base
+
+        for epoch, pos in zip(self._ts_epochs[a:b], self._ts_positions[a:b]):
+            try:
+                t_type, ref_type, lines = ledger.row(pos - base)
+                if not (t_type == 'sales' or (t_type == 'correction' and ref_type == 'sales')): continue
+                sold = units.setdefault(epoch // unit * unit, {})
+                for name, qty, price, subtotal in lines:
+                    amt = float(subtotal) if t_type == 'sales' else qty * price
+                    cell = sold.setdefault(name, [0, 0.0])
+                    cell[0] += qty
+                    cell[1] += amt
+            except Exception:
+                continue
+
+    # --- Sales Velocity ---
+    def _velocity_decay(self) -> float:
+        """Decay rate per second for the configured velocity_half_life_days."""
+        try:
+            half_life = float(self.config.get("velocity_half_life_days", 7))
+        except (TypeError, ValueError):
+            half_life = 7.0
+        return math.log(2) / (max(half_life, 0.01) * 86400)
+
+    def _velocity_table(self) -> Dict[str, List[float]]:
+        """
+        Exponentially decayed units sold per product. Built on first use from the last
+        VELOCITY_HORIZON_HALF_LIVES half-lives of the timestamp index, then updated in O(1)
+        by add_transaction. Malformed timestamps have no time and are left out.
+        """
+        lam = self._velocity_decay()
+        if self._velocity is None or self._velocity_lambda != lam:
+            self._velocity, self._velocity_lambda = {}, lam
+            horizon = naive_epoch(datetime.datetime.now()) - self.VELOCITY_HORIZON_HALF_LIVES * math.log(2) / lam
+            self._ensure_range_loaded(horizon, float("inf"))
+            first = bisect.bisect_left(self._ts_epochs, horizon)
+            for epoch, pos in zip(self._ts_epochs[first:], self._ts_positions[first:]):
+                self._add_velocity(pos, epoch)
+        return self._velocity
+
+    def _add_velocity(self, pos: int, epoch: float) -> None:
+        """Folds the sold quantities of the transaction at a ledger position into the velocity table."""
+        lam = self._velocity_lambda
+        try:
+            t_type, ref_type, lines = self.ledger.row(self._local(pos))
+            if not (t_type == 'sales' or (t_type == 'correction' and ref_type == 'sales')): return
+            for name, qty, _, _ in lines:
+                cell = self._velocity.get(name)
+                if cell is None:
+                    self._velocity[name] = [float(qty), epoch]
+                elif epoch >= cell[1]:
+                    cell[0] = cell[0] * math.exp(-lam * (epoch - cell[1])) + qty
+                    cell[1] = epoch
+                else:  # Backdated: decay the sale to the cell's newer reference time
+                    cell[0] += qty * math.exp(-lam * (cell[1] - epoch))
+        except Exception:
+            return
+
+    def sales_velocity(self, name: str, now: Optional[datetime.datetime] = None) -> float:
+        """Units sold per day, exponentially weighted with half-life velocity_half_life_days."""
+        with self._data_lock:
+            return self._decayed_rate(self._velocity_table().get(name), self._velocity_lambda,
+                                      now or datetime.datetime.now())
+
+    @staticmethod
+    def _decayed_rate(cell: Optional[Tuple[float, float]], lam: float, now: datetime.datetime) -> float:
+        """Units per day from a velocity table cell [decayed units, epoch decayed to]."""
+        if cell is None:
+            return 0.0
+        age = max(0.0, naive_epoch(now) - cell[1])
+        return max(0.0, cell[0] * math.exp(-lam * age) * lam * 86400)
+
+    def days_of_cover(self, name: str, now: Optional[datetime.datetime] = None) -> Optional[float]:
+        """Days the current stock lasts at the current sales velocity; None when the product is not selling."""
+        with self._data_lock:
+            return self._cover_days(self.get_stock_level(name), self._velocity_table().get(name),
+                                    self._velocity_lambda, now or datetime.datetime.now())
+
+    @classmethod
+    def _cover_days(cls, stock: int, cell: Optional[Tuple[float, float]], lam: float,
+                    now: datetime.datetime) -> Optional[float]:
+        if stock <= 0:
+            return 0.0
+        rate = cls._decayed_rate(cell, lam, now)
+        if rate < cls.MIN_VELOCITY:
+            return None
+        return stock / rate
+
     def get_stock_level(self, name: str) -> int:
         st = self.stock_cache.get(name, {'in': 0, 'out': 0})
         return st['in'] - st['out']
@@ -760,6 +3707,9 @@ class ReportManager:
                 if is_bi:
                     row_txt = [display_name, str(int(item['qty']))]
                     row_vals = [0, item['qty']]
+                    if 'cover' in item:
+                        row_txt.append(format_cover(item['cover']))
+                        row_vals.append(0)
                 elif is_summary:
                     price_txt = f"{item['price']:.2f}" if item['price'] > 0 else "-"
                     row_txt = [display_name, price_txt, str(int(item['in'])),
@@ -842,21 +3792,17 @@ class ReportManager:
             return False
 
     def generate_catchup_report(self, filepath: str, intervals: List[Tuple[datetime.datetime, datetime.datetime]],
-                                data_manager: 'DataManager', get_stats_func) -> bool:
+                                data_manager: 'DataManager') -> bool:
         try:
             canvas = self.mod.canvas
             letter = self.mod.letter
             c = canvas.Canvas(filepath, pagesize=letter)
 
-            for idx, (start, end) in enumerate(intervals):
-                # Calculate stats for this specific interval
-                # We reuse the logic from get_sum_data but we need to inject the period
-                # Since get_sum_data is in POSSystem, we will need to replicate aggregation logic here or pass a callback
-                # Ideally, we pass a callback that returns the formatted data rows for a given period
-
-                rows, in_c, out_c, corr_list = get_stats_func(period=(start, end))
+            # Every interval is aggregated in one sweep, so the page count does not multiply the cost
+            summaries = data_manager.summarize_intervals(intervals)
 
-                title = f"CATCHUP SUMMARY ({idx+1}/3)"
+            for idx, ((start, end), (rows, in_c, out_c, corr_list)) in enumerate(zip(intervals, summaries)):
+                title = f"CATCHUP SUMMARY ({idx+1}/{len(intervals)})"
                 date_str = f"{start.strftime('%Y-%m-%d %H:%M')} to {end.strftime('%Y-%m-%d %H:%M')}"
 
                 self.generate_grouped_pdf(
@@ -969,6 +3915,19 @@ class EmailManager:
 
         self.send_email_thread(recipient, subject, body, attachments, on_success=on_success)
 
+    def send_low_stock_digest(self, recipient: str, business_name: str, alerts: List[Dict]) -> None:
+        """One email listing every product that fell to or below its reorder level since the last digest."""
+        if not recipient or not alerts: return
+
+        safe_biz_name = "".join(c for c in business_name if c.isalnum() or c in (' ', '_', '-')).strip()
+        subject = f"Low Stock - {safe_biz_name} - {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}"
+        lines = [f"{a['name']}: {a['stock']} left (reorder level {a['level']}, since {a['time']})"
+                 for a in sorted(alerts, key=lambda a: a['name'])]
+        body = (f"Products at or below their reorder level:\n\n"
+                + "\n".join(lines))
+
+        self.send_email_thread(recipient, subject, body)
+
 # --- WEB SERVER THREAD ---
 class WebServerThread(threading.Thread):
     def __init__(self, modules: AppModules, task_queue: queue.Queue, port: int,
@@ -1072,6 +4031,7 @@ class POSSystem:
         # Initialize Managers
         if splash: splash.update_status("Loading Data Manager...")
         self.data_manager = DataManager(self.mod)
+        self.data_manager.start_write_behind()
         self.touch_mode = self.data_manager.config.get("touch_mode", False)
 
         self.report_manager = ReportManager(self.mod, self.data_manager.business_name, self.session_user, self.data_manager)
@@ -1082,6 +4042,7 @@ class POSSystem:
         self.inventory_cart: List[Dict] = []
         self.correction_cart: List[Dict] = []
         self.remote_requests: List[Dict] = []
+        self.last_low_stock_digest: float = 0.0  # time.time() of the last low-stock email
         self.lws_sidebars: Dict[str, ttk.Frame] = {}
 
         # Web Server State
@@ -1102,11 +4063,53 @@ class POSSystem:
         self.root.after(1000, self.check_beginning_inventory_reminder)
         self.root.after(2000, self.check_shortcuts)
         self.root.after(100, self.process_web_queue)
+        self.root.after(100, self.process_persistence_queue)
+        self.root.after(60000, self.process_low_stock_digest)
+        self.root.after(3000, self.process_period_close)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    # --- PERSISTENCE ---
+    def process_persistence_queue(self):
+        """Delivers write-behind results on the Tk thread."""
+        try:
+            while True:
+                callback, error = self.data_manager.writer.completed.get_nowait()
+                if callback:
+                    callback(error)
+                elif error is not None:
+                    messagebox.showerror("Save Error", f"Could not save database: {error}")
+        except queue.Empty:
+            pass
+        self.root.after(100, self.process_persistence_queue)
+
+    def notify_when_saved(self, message: str):
+        """on_durable callback that confirms a transaction only once it is on disk."""
+        def done(error):
+            if error is None:
+                messagebox.showinfo("Success", message)
+            else:
+                messagebox.showerror("Save Error", f"Could not save database: {error}")
+        return done
+
+    def on_close(self):
+        if not self.data_manager.flush_writes(timeout=10):
+            if not messagebox.askyesno("Saving", "Changes are still being written to disk.\nQuit anyway?"):
+                return
+        self.root.destroy()
 
     # --- UI SETUP ---
     def setup_ui(self):
         self.style_manager = StyleManager(self.root, self.touch_mode)
 
+        # Low-stock badge; hidden while no product is at or below its reorder level
+        self.alert_bar = ttk.Frame(self.root)
+        self.alert_bar.pack(fill="x", padx=2)
+        self.lbl_low_stock = ttk.Label(self.alert_bar, text="", foreground="#d32f2f",
+                                       font=("Segoe UI", 9, "bold"), cursor="hand2")
+        self.lbl_low_stock.bind("<Button-1>", lambda e: self.show_low_stock_alerts())
+        self.data_manager.alert_listener = self.update_low_stock_badge
+        self.update_low_stock_badge()
+
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(expand=True, fill='both', padx=2, pady=2)
 
@@ -1130,8 +4133,63 @@ class POSSystem:
 
         self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_change)
 
+    # --- LOW-STOCK ALERTS ---
+    def update_low_stock_badge(self):
+        count = len(self.data_manager.low_stock)
+        if count:
+            self.lbl_low_stock.config(text=f"\u26a0 {count} product(s) at or below reorder level")
+            self.lbl_low_stock.pack(side="right", padx=5)
+        else:
+            self.lbl_low_stock.pack_forget()
+
+    def show_low_stock_alerts(self):
+        win = tk.Toplevel(self.root)
+        win.title("Low Stock")
+        win.geometry("600x400")
+
+        tree = ttk.Treeview(win, columns=("name", "stock", "level", "since"), show="headings")
+        tree.heading("name", text="Product Name")
+        tree.heading("stock", text="Stock")
+        tree.heading("level", text="Reorder Level")
+        tree.heading("since", text="Since")
+        tree.column("name", width=280)
+        for col in ["stock", "level"]: tree.column(col, width=70)
+        tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        for alert in sorted(self.data_manager.low_stock.values(), key=lambda a: (a['stock'] - a['level'], a['name'])):
+            tree.insert("", "end", values=(alert['name'], alert['stock'], alert['level'], alert['time']))
+
+        ttk.Button(win, text="Close", command=win.destroy).pack(pady=10)
+
+    def process_low_stock_digest(self):
+        """Emails the alerts batched since the last digest every low_stock_digest_minutes (0: off)."""
+        try:
+            minutes = float(self.data_manager.config.get("low_stock_digest_minutes", 0))
+        except (TypeError, ValueError):
+            minutes = 0
+        recipient = self.data_manager.config.get("recipient_email", "").strip()
+        if minutes > 0 and recipient:
+            now = time.time()
+            if now - self.last_low_stock_digest >= minutes * 60:
+                alerts = self.data_manager.take_alert_digest()
+                if alerts:
+                    self.email_manager.send_low_stock_digest(recipient, self.data_manager.business_name, alerts)
+                    self.last_low_stock_digest = now
+        self.root.after(60000, self.process_low_stock_digest)
+
+    def process_period_close(self):
+        """Closes finished days (Z-reports) at startup and every 10 minutes, when auto_close_days is on."""
+        if self.data_manager.config.get("auto_close_days", True):
+            try:
+                self.data_manager.close_periods()
+            except Exception as e:
+                print(f"Period Close Error: {e}")
+        self.root.after(600000, self.process_period_close)
+
     def on_tab_change(self, event):
-        self.data_manager.refresh_stock_cache()
+        # Stock cache is kept current by add_transaction; only verify it in debug mode
+        if self.data_manager.config.get("debug_stock_check", False):
+            self.data_manager.verify_stock_cache()
 
         # Reset specific tab states
         if hasattr(self, 'pos_qty_var'): self.pos_qty_var.set(1)
@@ -1328,9 +4386,9 @@ class POSSystem:
         )
 
         if success:
-            self.data_manager.add_transaction("inventory", fname, self.inventory_cart, date_str)
+            self.data_manager.add_transaction("inventory", fname, self.inventory_cart, date_str,
+                                              on_durable=self.notify_when_saved(f"Stock Added. Receipt: {fname}"))
             self.clear_inv()
-            messagebox.showinfo("Success", f"Stock Added. Receipt: {fname}")
 
     # --- POS (SALES) TAB ---
     def setup_pos_tab(self):
@@ -1462,9 +4520,9 @@ class POSSystem:
         )
 
         if success:
-            self.data_manager.add_transaction("sales", fname, self.sales_cart, date_str)
+            self.data_manager.add_transaction("sales", fname, self.sales_cart, date_str,
+                                              on_durable=self.notify_when_saved(f"Saved: {fname}"))
             self.clear_pos()
-            messagebox.showinfo("Success", f"Saved: {fname}")
 
     # --- CORRECTION TAB ---
     def setup_correction_tab(self):
@@ -1516,13 +4574,11 @@ class POSSystem:
         target_type = self.corr_type_var.get()
         now_str = datetime.datetime.now().strftime("%Y-%m-%d")
 
-        for trans in self.data_manager.ledger:
-            if trans.get('type') == target_type:
-                ts = trans.get('timestamp', '')
-                if ts.startswith(now_str):
-                    time_part = ts.split(' ')[1] if ' ' in ts else ts
-                    self.corr_list_tree.insert("", "end", values=(time_part, trans.get('filename')),
-                                               tags=(json.dumps(trans),))
+        for trans in self.data_manager.get_transactions_for_day(target_type, now_str):
+            ts = trans.get('timestamp', '')
+            time_part = ts.split(' ')[1] if ' ' in ts else ts
+            self.corr_list_tree.insert("", "end", values=(time_part, trans.get('filename')),
+                                       tags=(json.dumps(trans),))
 
     def load_receipt_for_correction(self):
         sel = self.corr_list_tree.selection()
@@ -1592,12 +4648,12 @@ class POSSystem:
 
         if success:
             self.data_manager.add_transaction("correction", fname, ledger_adjustment_items,
-                                              date_str, self.selected_transaction['type'], ref_file)
+                                              date_str, self.selected_transaction['type'], ref_file,
+                                              on_durable=self.notify_when_saved(f"Correction Saved: {fname}"))
 
             for i in self.corr_edit_tree.get_children(): self.corr_edit_tree.delete(i)
             self.lbl_corr_target.config(text="No receipt selected")
             self.selected_transaction = None
-            messagebox.showinfo("Success", f"Correction Saved: {fname}")
 
     # --- SUMMARY TAB ---
     def setup_summary_tab(self):
@@ -1607,6 +4663,8 @@ class POSSystem:
         ttk.Label(f, text="Period:").pack(side="left")
         self.report_type = tk.StringVar(value="All Time")
         ttk.OptionMenu(f, self.report_type, "All Time", "Daily", "Weekly", "Monthly", "All Time").pack(side="left", padx=5)
+        self.report_type.trace_add("write", lambda *args: self.on_summary_period_change())
+        self.summary_job: Optional[Dict] = None  # Background summary currently feeding the table
 
         self.chk_custom_date_var = tk.BooleanVar(value=False)
         self.chk_custom_date = ttk.Checkbutton(f, text="OTHER DATE", variable=self.chk_custom_date_var,
@@ -1635,12 +4693,23 @@ class POSSystem:
 
         ttk.Button(f, text="Refresh View", command=self.gen_view).pack(side="left", padx=10)
         ttk.Button(f, text="Gen PDF", command=self.gen_pdf).pack(side="left", padx=5)
-
-        tree_frame = ttk.Frame(self.tab_summary)
-        tree_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        self.btn_sum_cancel = ttk.Button(f, text="Cancel", command=self.cancel_summary_job, state="disabled")
+        self.btn_sum_cancel.pack(side="left", padx=5)
+        self.sum_progress = ttk.Progressbar(f, length=140, mode="determinate")
+        self.sum_progress.pack(side="left", padx=5)
+
+        self.summary_notebook = ttk.Notebook(self.tab_summary)
+        self.summary_notebook.pack(fill="both", expand=True, padx=5, pady=5)
+        self.tab_sum_products = ttk.Frame(self.summary_notebook)
+        self.tab_sum_curve = ttk.Frame(self.summary_notebook)
+        self.summary_notebook.add(self.tab_sum_products, text="Products")
+        self.summary_notebook.add(self.tab_sum_curve, text="Sales Curve")
+
+        tree_frame = ttk.Frame(self.tab_sum_products)
+        tree_frame.pack(fill="both", expand=True)
         scrollbar = ttk.Scrollbar(tree_frame)
         scrollbar.pack(side="right", fill="y")
-        self.sum_tree = ttk.Treeview(tree_frame, columns=("cat", "name", "price", "in", "out", "rem", "sale"),
+        self.sum_tree = ttk.Treeview(tree_frame, columns=("cat", "name", "price", "in", "out", "rem", "sale", "cover"),
                                      show="headings", yscrollcommand=scrollbar.set)
         scrollbar.config(command=self.sum_tree.yview)
 
@@ -1651,16 +4720,76 @@ class POSSystem:
         self.sum_tree.heading("out", text="Out")
         self.sum_tree.heading("rem", text="Stk")
         self.sum_tree.heading("sale", text="Sales")
-        for col in ["in", "out", "rem", "price"]: self.sum_tree.column(col, width=50)
+        self.sum_tree.heading("cover", text="Cover (d)")
+        for col in ["in", "out", "rem", "price", "cover"]: self.sum_tree.column(col, width=50)
         self.sum_tree.pack(fill="both", expand=True)
         self.lbl_sum_info = ttk.Label(self.tab_summary, text="Ready")
         self.lbl_sum_info.pack(pady=2)
 
+        self.setup_sales_curve_view()
+
+    def setup_sales_curve_view(self):
+        f = ttk.Frame(self.tab_sum_curve)
+        f.pack(fill="x", padx=5, pady=5)
+
+        ttk.Label(f, text="Last:").pack(side="left")
+        self.curve_range = tk.StringVar(value="7 Days")
+        ttk.OptionMenu(f, self.curve_range, "7 Days", "1 Day", "7 Days", "30 Days", "90 Days").pack(side="left", padx=5)
+
+        ttk.Label(f, text="By:").pack(side="left")
+        self.curve_bucket = tk.StringVar(value="Day")
+        ttk.OptionMenu(f, self.curve_bucket, "Day", "Hour", "Day", "Week").pack(side="left", padx=5)
+
+        self.curve_group = tk.StringVar(value="Category")
+        ttk.OptionMenu(f, self.curve_group, "Category", "Product", "Category").pack(side="left", padx=5)
+
+        ttk.Button(f, text="Show", command=self.show_sales_curve).pack(side="left", padx=10)
+
+        tree_frame = ttk.Frame(self.tab_sum_curve)
+        tree_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        scrollbar = ttk.Scrollbar(tree_frame)
+        scrollbar.pack(side="right", fill="y")
+        self.curve_tree = ttk.Treeview(tree_frame, columns=("bucket", "key", "qty", "sale", "bar"),
+                                       show="headings", yscrollcommand=scrollbar.set)
+        scrollbar.config(command=self.curve_tree.yview)
+
+        self.curve_tree.heading("bucket", text="From")
+        self.curve_tree.heading("key", text="Group")
+        self.curve_tree.heading("qty", text="Sold")
+        self.curve_tree.heading("sale", text="Sales")
+        self.curve_tree.heading("bar", text="")
+        for col in ["qty", "sale"]: self.curve_tree.column(col, width=70)
+        self.curve_tree.column("bar", width=220)
+        self.curve_tree.pack(fill="both", expand=True)
+
+    def show_sales_curve(self):
+        """Fills the Sales Curve sub-view from DataManager.sales_by_bucket, with a text bar per row."""
+        end = datetime.datetime.now()
+        start = end - datetime.timedelta(days=int(self.curve_range.get().split()[0]))
+        bucket = self.curve_bucket.get().lower()
+        curve = self.data_manager.sales_by_bucket(start, end, bucket, self.curve_group.get().lower())
+
+        for i in self.curve_tree.get_children(): self.curve_tree.delete(i)
+
+        fmt = "%Y-%m-%d %H:00" if bucket == "hour" else "%Y-%m-%d"
+        peak = max((c['sales'] for cells in curve.values() for c in cells.values()), default=0)
+        total = 0
+        for bucket_start, cells in curve.items():
+            for key in sorted(cells, key=str):
+                cell = cells[key]
+                total += cell['sales']
+                bar = "\u2588" * int(round(30 * cell['sales'] / peak)) if peak > 0 else ""
+                self.curve_tree.insert("", "end", values=(bucket_start.strftime(fmt), key, cell['qty'],
+                                                          f"{cell['sales']:.2f}", bar))
+
+        self.lbl_sum_info.config(text=f"Sales Curve: {len(curve)} {bucket} buckets | Sales: {total:.2f}")
+
     def toggle_custom_date(self):
         state = "readonly" if self.chk_custom_date_var.get() else "disabled"
         self.cmb_year.config(state=state)
         self.cmb_month.config(state=state)
         self.cmb_day.config(state=state)
+        self.on_summary_period_change()
 
     def get_period_dates(self):
         if self.chk_custom_date_var.get():
@@ -1684,99 +4813,128 @@ class POSSystem:
         return None
 
     def get_sum_data(self, override_period=None):
-        global_stats, _, _, _ = self.data_manager.calculate_stats(None)
-
         # Use filtered period if override_period provided, otherwise get from UI selection
         if override_period:
             period = override_period
         else:
             period = self.get_period_dates()
 
-        period_stats, in_c, out_c, corr_list = self.data_manager.calculate_stats(period)
-
-        rows = []
-        all_names = set(self.data_manager.products_df['Product Name'].astype(str)) | set(global_stats.keys())
-
-        for name in all_names:
-            name = name.strip()
-            g_data = global_stats.get(name, {'in': 0, 'out': 0})
-            rem_stock = g_data['in'] - g_data['out']
-
-            _, _, curr_price, cat = self.data_manager.get_product_details_by_str(f"{name}")
-            p_data = period_stats.get(name, {'in': 0, 'out': 0, 'sales_lines': [], 'in_lines': []})
-
-            price_map = {}
-            # Aggregate by price point
-            for line in p_data['sales_lines']:
-                p = line['price']
-                if p not in price_map: price_map[p] = {'in': 0, 'out': 0, 'sales': 0}
-                price_map[p]['out'] += line['qty']
-                price_map[p]['sales'] += line['amt']
-            for line in p_data['in_lines']:
-                p = line['price']
-                if p not in price_map: price_map[p] = {'in': 0, 'out': 0, 'sales': 0}
-                price_map[p]['in'] += line['qty']
-
-            if not price_map: price_map[curr_price] = {'in': 0, 'out': 0, 'sales': 0}
-
-            for price, data in price_map.items():
-                show_rem = rem_stock if price == curr_price else 0
-
-                # Filter Logic
-                # If using override_period (catchup), we behave like a specific period report (hide zeros)
-                # If UI selected "All Time", we show everything including zero movement items if they exist in inventory
-
-                is_all_time = (self.report_type.get() == "All Time") and (override_period is None)
-
-                if not is_all_time:
-                    if data['in'] == 0 and data['out'] == 0: continue
-                elif data['in'] == 0 and data['out'] == 0 and show_rem == 0 and name not in set(
-                        self.data_manager.products_df['Product Name']):
-                    continue
-
-                if cat == "Phased Out" and name in global_stats: name = global_stats[name]['name'] + " (Old)"
-
-                rows.append({
-                    'code': "", 'category': cat, 'name': name, 'price': price,
-                    'in': data['in'], 'out': data['out'], 'remaining': show_rem, 'sales': data['sales']
-                })
+        # If using override_period (catchup), we behave like a specific period report (hide zeros)
+        # If UI selected "All Time", we show everything including zero movement items if they exist in inventory
+        is_all_time = (self.report_type.get() == "All Time") and (override_period is None)
+        return self.data_manager.summarize(period, show_idle=is_all_time)
 
-        final_rows = []
-        names_in_excel = set(self.data_manager.products_df['Product Name'].astype(str))
-        for r in rows:
-            is_active = (r['in'] > 0 or r['out'] > 0 or r['remaining'] > 0 or r['name'] in names_in_excel)
-            if is_active: final_rows.append(r)
+    def gen_view(self, override_period=None, on_done=None):
+        """
+        Computes the summary on a worker thread and fills the table in chunks via root.after.
+        on_done(data, tot, p_txt, in_c, out_c, corr_list) runs once every row is shown.
+        A running job is cancelled, not queued behind.
+        """
+        self._stop_summary_job()
 
-        return final_rows, in_c, out_c, corr_list
+        # Use filtered period if override_period provided, otherwise get from UI selection
+        period = override_period if override_period else self.get_period_dates()
+        is_all_time = (self.report_type.get() == "All Time") and (override_period is None)
 
-    def gen_view(self, override_period=None):
-        data, in_c, out_c, corr_list = self.get_sum_data(override_period)
-        for i in self.sum_tree.get_children(): self.sum_tree.delete(i)
+        p_txt = self.report_type.get()
+        if p_txt != "All Time" and period:
+            s, e = period
+            if s and e:
+                p_txt = f"{s.strftime('%m-%d')} to {e.strftime('%m-%d')}"
 
         def sort_key(x):
             cat = x['category']
             if cat == "Phased Out": cat = "zzz_Phased Out"
             return (cat, x['name'])
 
-        data = sorted(data, key=sort_key)
-        tot = 0
-        for s in data:
+        job = {"cancel": threading.Event(), "progress": (0, 0), "result": None, "error": None, "done": False,
+               "override": override_period, "on_done": on_done}
+
+        def work():
+            try:
+                data, in_c, out_c, corr_list = self.data_manager.summarize(
+                    period, show_idle=is_all_time, cancel=job["cancel"],
+                    progress=lambda done, total: job.update(progress=(done, total)))
+                data = sorted(data, key=sort_key)
+                tot = sum(s['sales'] for s in data)
+                job["result"] = (data, tot, p_txt, in_c, out_c, corr_list)
+            except SummaryCancelled:
+                pass
+            except Exception as e:
+                job["error"] = e
+            job["done"] = True
+
+        self.data_manager.prepare_period(period)
+        self.summary_job = job
+        for i in self.sum_tree.get_children(): self.sum_tree.delete(i)
+        self.sum_progress.config(value=0, maximum=100)
+        self.btn_sum_cancel.config(state="normal")
+        self.lbl_sum_info.config(text=f"Period: {p_txt} | Computing...")
+        threading.Thread(target=work, daemon=True).start()
+        self.root.after(50, self._poll_summary_job, job, on_done)
+
+    def _poll_summary_job(self, job, on_done):
+        if job is not self.summary_job: return  # Cancelled or superseded
+        if not job["done"]:
+            done, total = job["progress"]
+            if total:
+                self.sum_progress.config(value=50 * done / total)  # First half: computing
+            self.root.after(50, self._poll_summary_job, job, on_done)
+            return
+
+        if job["error"] is not None:
+            self._stop_summary_job()
+            self.lbl_sum_info.config(text="Summary failed")
+            messagebox.showerror("Summary Error", f"Could not build summary: {job['error']}")
+            return
+        if job["result"] is None:
+            return  # Cancelled after the last progress check
+        self._insert_summary_rows(job, 0, on_done)
+
+    def _insert_summary_rows(self, job, start, on_done):
+        """Inserts one chunk of rows per event-loop turn so the window stays responsive."""
+        if job is not self.summary_job: return
+        data, tot, p_txt = job["result"][:3]
+        end = min(start + SUMMARY_INSERT_CHUNK, len(data))
+        for s in data[start:end]:
             self.sum_tree.insert("", "end",
                                  values=(s['category'], s['name'], f"{s['price']:.2f}", int(s['in']), int(s['out']),
-                                         int(s['remaining']), f"{s['sales']:.2f}"))
-            tot += s['sales']
+                                         int(s['remaining']), f"{s['sales']:.2f}",
+                                         format_cover(s['cover']) if 'cover' in s else ""))
+        if end < len(data):
+            self.sum_progress.config(value=50 + 50 * end / len(data))  # Second half: filling the table
+            self.lbl_sum_info.config(text=f"Period: {p_txt} | Loading {end}/{len(data)} rows...")
+            self.root.after(1, self._insert_summary_rows, job, end, on_done)
+            return
 
-        p_txt = self.report_type.get()
-        if p_txt != "All Time":
-            s, e = override_period if override_period else self.get_period_dates()
-            if s and e:
-                p_txt = f"{s.strftime('%m-%d')} to {e.strftime('%m-%d')}"
+        self._stop_summary_job()
         self.lbl_sum_info.config(text=f"Period: {p_txt} | Sales: {tot:.2f}")
-        return data, tot, p_txt, in_c, out_c, corr_list
+        if on_done:
+            on_done(*job["result"])
+
+    def _stop_summary_job(self):
+        job, self.summary_job = self.summary_job, None
+        if job:
+            job["cancel"].set()
+        self.sum_progress.config(value=0)
+        self.btn_sum_cancel.config(state="disabled")
+
+    def cancel_summary_job(self):
+        if self.summary_job is None: return
+        self._stop_summary_job()
+        self.lbl_sum_info.config(text="Cancelled")
+
+    def on_summary_period_change(self):
+        """A new period while a view is computing replaces the stale job, keeping what it was for (e.g. Gen PDF)."""
+        job = self.summary_job
+        if job is not None and job["override"] is None:
+            self.gen_view(on_done=job["on_done"])
 
     def gen_pdf(self):
         is_custom_date = self.chk_custom_date_var.get()
-        data, tot, p_txt, in_c, out_c, corr_list = self.gen_view()
+        self.gen_view(on_done=lambda *view: self._write_summary_pdf(is_custom_date, *view))
+
+    def _write_summary_pdf(self, is_custom_date, data, tot, p_txt, in_c, out_c, corr_list):
         now = datetime.datetime.now()
 
         prefix = "History" if is_custom_date else "Summary"
@@ -1809,21 +4967,17 @@ class POSSystem:
                             catchup_fname = f"Catchup_{now.strftime('%Y%m%d-%H%M%S')}.pdf"
                             catchup_path = os.path.join(SUMMARY_FOLDER, catchup_fname)
 
-                            # We pass get_sum_data (wrapper) to generate_catchup_report
-                            # get_sum_data requires 'period' as override
-                            # But get_sum_data signature is (self, override_period=None)
-                            # so we can use a lambda
                             c_success = self.report_manager.generate_catchup_report(
                                 catchup_path,
                                 catchup_intervals,
-                                self.data_manager,
-                                lambda period: self.get_sum_data(override_period=period)
+                                self.data_manager
                             )
                             if c_success:
                                 extra_attachments.append(catchup_path)
 
                     self.email_manager.trigger_summary_email(
-                        recipient, full_path, LEDGER_FILE, self.data_manager.business_name,
+                        recipient, full_path, self.data_manager.get_ledger_export_path(),
+                        self.data_manager.business_name,
                         self.data_manager.summary_count, self.session_user,
                         extra_attachments=extra_attachments,
                         on_success=self.update_email_sync_timestamp
@@ -1874,6 +5028,21 @@ class POSSystem:
         if total_duration.total_seconds() < 60:
             return [] # Too short to bother
 
+        # Fixed-length intervals (e.g. 1 = hourly, 24 = daily) when configured
+        try:
+            hours = float(self.data_manager.config.get("catchup_interval_hours", 0))
+        except (TypeError, ValueError):
+            hours = 0
+        if hours > 0:
+            step = datetime.timedelta(hours=hours)
+            intervals = []
+            i_start = start
+            while i_start < end:
+                i_end = min(i_start + step, end)
+                intervals.append((i_start, i_end))
+                i_start = i_end
+            return intervals
+
         segment = total_duration / 3
 
         i1_end = start + segment
@@ -1937,6 +5106,7 @@ class POSSystem:
         bf.pack(anchor="w", pady=5)
         ttk.Button(bf, text="Backup (.json)", command=self.backup_data_json).pack(side="left", padx=5)
         ttk.Button(bf, text="Restore (.json)", command=self.restore_data_json).pack(side="left", padx=5)
+        ttk.Button(bf, text="Restore Backup Point", command=self.restore_backup_point).pack(side="left", padx=5)
 
         ttk.Separator(f, orient='horizontal').pack(fill='x', pady=10)
         ttk.Label(f, text="Maintenance", font=("Segoe UI", 10, "bold")).pack(anchor="w")
@@ -1945,6 +5115,12 @@ class POSSystem:
         ttk.Button(mf, text="Harmonize Receipts", command=lambda: self.harmonize_receipts(silent=False)).pack(side="left", padx=5)
         ttk.Button(mf, text="Restore Products File", command=self.regenerate_products_file).pack(side="left", padx=5)
 
+        self.chk_sqlite_var = tk.BooleanVar(value=self.data_manager.config.get("ledger_backend", "json") == "sqlite")
+        ttk.Checkbutton(f, text="Use SQLite Ledger Store", variable=self.chk_sqlite_var, command=self.toggle_ledger_backend).pack(pady=5, anchor="w")
+        self.chk_compress_var = tk.BooleanVar(value=self.data_manager.config.get("ledger_compression", False))
+        ttk.Checkbutton(f, text="Compress Ledger Files (.jsonl.gz)", variable=self.chk_compress_var,
+                        command=lambda: self.data_manager.set_ledger_compression(self.chk_compress_var.get())).pack(pady=5, anchor="w")
+
         ttk.Separator(f, orient='horizontal').pack(fill='x', pady=10)
         ttk.Button(f, text="Load Test (Dev)", command=self.run_load_test, style="Danger.TButton").pack(anchor="w", pady=5)
 
@@ -1989,6 +5165,18 @@ class POSSystem:
         # Note: full effect requires restart, but we can try to re-apply styles
         messagebox.showinfo("Restart Required", "Please restart the application for Touch Mode changes to fully take effect.")
 
+    def toggle_ledger_backend(self):
+        enabled = self.chk_sqlite_var.get()
+        if not enabled and self.data_manager.store:
+            # Leave the current history behind in the partitioned layout for the JSON backend
+            self.data_manager.write_json_layout()
+        if enabled and not self.data_manager.store:
+            self.data_manager.config["ledger_migrate_pending"] = True
+        self.data_manager.config["ledger_backend"] = "sqlite" if enabled else "json"
+        self.data_manager.save_config()
+        messagebox.showinfo("Restart Required", "Please restart the application to switch the ledger store.\n"
+                                                "The existing ledger is migrated automatically on first start.")
+
     def toggle_startup(self):
         startup_folder = os.path.join(os.getenv("APPDATA"), r"Microsoft\Windows\Start Menu\Programs\Startup")
         bat_path = os.path.join(startup_folder, "POS_System_Auto.bat")
@@ -2011,39 +5199,50 @@ class POSSystem:
             messagebox.showinfo("Startup", "Disabled.")
 
     def backup_data_json(self):
-        if not self.data_manager.ledger:
+        transactions = self.data_manager.get_all_transactions()
+        if not transactions:
             messagebox.showinfo("Backup", "No data to backup.")
             return
-        save_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON Database", "*.json")])
+        filetypes = [("JSON Database", "*.json"), ("Compressed Ledger", "*" + COMPRESSED_LEDGER_EXT)]
+        if self.data_manager.config.get("ledger_compression", False):
+            filetypes.reverse()
+        save_path = filedialog.asksaveasfilename(defaultextension=filetypes[0][1][1:], filetypes=filetypes)
         if save_path:
             try:
                 products_data = self.data_manager.get_product_list()
                 data = {
-                    "transactions": self.data_manager.ledger,
+                    "transactions": transactions,
                     "summary_count": self.data_manager.summary_count,
                     "products_master": products_data,
                     "shortcuts_asked": self.data_manager.shortcuts_asked
                 }
-                with open(save_path, 'w') as f:
-                    json.dump(data, f, indent=2)
+                if is_compressed_ledger(save_path):
+                    write_ledger_jsonl(save_path, data.pop("transactions"), data)
+                else:
+                    with open(save_path, 'w') as f:
+                        json.dump(data, f, indent=2)
                 messagebox.showinfo("Backup", "Done.")
             except Exception as e:
                 messagebox.showerror("Error", f"Backup failed: {e}")
 
     def restore_data_json(self):
-        path = filedialog.askopenfilename(filetypes=[("JSON Database", "*.json")])
+        path = filedialog.askopenfilename(filetypes=[("Ledger Backup", "*.json *" + COMPRESSED_LEDGER_EXT),
+                                                     ("JSON Database", "*.json"),
+                                                     ("Compressed Ledger", "*" + COMPRESSED_LEDGER_EXT)])
         if not path: return
         if not messagebox.askyesno("Confirm", "Overwrite data and REGENERATE receipts?"): return
         try:
-            with open(path, 'r') as f:
-                backup_data = json.load(f)
+            backup_data: Dict = {}
+            transactions = ColumnarLedger(iter_ledger_file(path, backup_data))
 
             # Restore logic coordinated via DataManager
-            if isinstance(backup_data, list):
-                self.data_manager.ledger = backup_data
+            if not backup_data:
+                self.data_manager.replace_ledger(transactions)
                 self.data_manager.summary_count = 0
-            elif isinstance(backup_data, dict):
-                self.data_manager.ledger = backup_data.get("transactions", [])
+            else:
+                if backup_data.get("partitioned"):
+                    transactions = self.data_manager.read_partitioned_backup(path)
+                self.data_manager.replace_ledger(transactions)
                 self.data_manager.summary_count = backup_data.get("summary_count", 0)
                 self.data_manager.shortcuts_asked = backup_data.get("shortcuts_asked", False)
 
@@ -2060,14 +5259,57 @@ class POSSystem:
                     except Exception:
                         pass # Non-critical
 
-            self.harmonize_receipts(silent=True)
-            self.data_manager.save_ledger()
-            self.data_manager.refresh_stock_cache()
-            messagebox.showinfo("Success", f"Restored {len(self.data_manager.ledger)} records.")
+            self._finish_restore()
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed: {e}")
 
+    def _finish_restore(self):
+        self.harmonize_receipts(silent=True)
+        self.data_manager.save_ledger()
+        self.data_manager.refresh_stock_cache()
+        messagebox.showinfo("Success", f"Restored {len(self.data_manager.ledger)} records.")
+
+    def restore_backup_point(self):
+        points = self.data_manager.list_backup_points()
+        if not points:
+            messagebox.showinfo("Restore", "No backup points available yet.")
+            return
+
+        win = tk.Toplevel(self.root)
+        win.title("Restore Backup Point")
+        win.geometry("420x360")
+        win.transient(self.root)
+        win.grab_set()
+
+        ttk.Label(win, text="Select a point in time to restore:").pack(anchor="w", padx=10, pady=(10, 5))
+        lb = tk.Listbox(win, height=12)
+        lb.pack(fill="both", expand=True, padx=10)
+        for point in points:
+            kind = "Full" if point["kind"] == "base" else "Incremental"
+            lb.insert(tk.END, f"{point['timestamp']}  |  {point['position']} records  |  {kind}")
+        lb.selection_set(0)
+
+        def do_restore():
+            sel = lb.curselection()
+            if not sel: return
+            point = points[sel[0]]
+            if not messagebox.askyesno("Confirm", f"Restore the ledger as of {point['timestamp']}?\n"
+                                                  "Overwrite data and REGENERATE receipts?", parent=win):
+                return
+            try:
+                transactions, meta = self.data_manager.load_backup_point(point)
+                self.data_manager.replace_ledger(transactions)
+                self.data_manager.summary_count = meta.get("summary_count", 0)
+                self.data_manager.shortcuts_asked = meta.get("shortcuts_asked", False)
+                self.data_manager.product_history = meta.get("product_history", [])
+                win.destroy()
+                self._finish_restore()
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed: {e}", parent=win)
+
+        ttk.Button(win, text="Restore", command=do_restore).pack(pady=10)
+
     def harmonize_receipts(self, silent: bool = False):
         if not silent:
             if not messagebox.askyesno("Confirm", "This will DELETE and REGENERATE all PDF receipts from the database.\nContinue?"):
@@ -2078,7 +5320,7 @@ class POSSystem:
             for folder in [INVENTORY_FOLDER, RECEIPT_FOLDER, CORRECTION_FOLDER]:
                 if os.path.exists(folder): shutil.rmtree(folder); os.makedirs(folder)
 
-            for entry in self.data_manager.ledger:
+            for entry in self.data_manager.get_all_transactions():
                 fname = entry.get('filename')
                 date_str = entry.get('timestamp')
                 items = entry.get('items', [])
@@ -2196,7 +5438,7 @@ class POSSystem:
         if not messagebox.askyesno("WARNING",
                                    "This will DELETE ALL DATA and generate dummy data for the last 30 days.\n\nAre you sure?"): return
 
-        self.data_manager.ledger = []
+        ledger: List[Dict] = []
         self.data_manager.summary_count = 0
         for folder in [INVENTORY_FOLDER, RECEIPT_FOLDER, CORRECTION_FOLDER]:
             if os.path.exists(folder): shutil.rmtree(folder); os.makedirs(folder)
@@ -2240,7 +5482,7 @@ class POSSystem:
                             inv_items, ["Item", "Price", "Qty Added", "New Stock"],
                             [1.0, 4.5, 5.5, 6.5], subtotal_indices=[2], is_inventory=True
                         )
-                        self.data_manager.ledger.append(
+                        ledger.append(
                             {"type": "inventory", "timestamp": ts, "filename": fname, "items": inv_items})
 
                 # Sales Logic
@@ -2273,8 +5515,9 @@ class POSSystem:
                             ["Item", "Price", "Qty", "Total"], [1.0, 4.5, 5.5, 6.5],
                             subtotal_indices=[2, 3]
                         )
-                        self.data_manager.ledger.append({"type": "sales", "timestamp": ts, "filename": fname, "items": sales_items})
+                        ledger.append({"type": "sales", "timestamp": ts, "filename": fname, "items": sales_items})
 
+            self.data_manager.replace_ledger(ledger)
             self.data_manager.save_ledger()
             self.data_manager.refresh_stock_cache()
             messagebox.showinfo("Load Test", "Simulation Complete.\nData overwritten.")
@@ -2602,6 +5845,7 @@ class POSSystem:
                 "name": name,
                 "category": cat,
                 "qty": qty,
+                "cover": self.data_manager.days_of_cover(name),
                 "price": 0, # Not used in BI
                 "subtotal": 0 # Not used in BI
             })
@@ -2614,6 +5858,7 @@ class POSSystem:
                     "name": f"{name} (Old)",
                     "category": "Phased Out",
                     "qty": qty,
+                    "cover": self.data_manager.days_of_cover(name),
                     "price": 0,
                     "subtotal": 0
                 })
@@ -2627,8 +5872,8 @@ class POSSystem:
         success = self.report_manager.generate_grouped_pdf(
             full_path, "BEGINNING INVENTORY",
             today.strftime('%Y-%m-%d %H:%M:%S'), items,
-            ["Product", "Qty"],
-            [1.0, 6.0], is_summary=False,
+            ["Product", "Qty", "Cover (d)"],
+            [1.0, 6.0, 6.7], is_summary=False,
             extra_info=f"Start of Day: {today_str}",
             is_bi=True
         )
@@ -2636,6 +5881,8 @@ class POSSystem:
         if success:
             self.data_manager.summary_count += 1
             self.data_manager.save_ledger()
+            # Start-of-day stock is a natural checkpoint for the next cold start
+            self.data_manager.write_stock_checkpoint()
             self.data_manager.config["last_bi_date"] = today_str
             self.data_manager.save_config()
 
@@ -2664,7 +5911,7 @@ class POSSystem:
 
                 self.email_manager.send_email_thread(
                     recipient, subject, body,
-                    [full_path, LEDGER_FILE]
+                    [full_path, self.data_manager.get_ledger_export_path()]
                 )
 
             # Optional: Silent or unobtrusive notification
@@ -2736,7 +5983,9 @@ def launch_app():
         try:
             splash.update_status("Loading Data Engine (pandas)...")
             import pandas as pd
+            import numpy as np
             AppModules.pd = pd
+            AppModules.np = np
 
             splash.update_status("Loading PDF Engine (reportlab)...")
             from reportlab.pdfgen import canvas
@@ -0,0 +1,49 @@
+import os
+import sys
+import tempfile
+import unittest
+
+main = None
+
+
+def setUpModule():
+    global main
+    work = tempfile.mkdtemp()
+    os.environ["APPDATA"] = work
+    os.chdir(work)  # main creates its receipt folders in the working directory
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import main as module
+    import pandas
+    module.AppModules.pd = pandas
+    main = module
+
+
+class GroupCommitTest(unittest.TestCase):
+    def test_burst_within_window_is_one_flush(self):
+        dm = main.DataManager(main.AppModules)
+        dm.config["group_commit_ms"] = 300
+        dm.start_write_behind()
+
+        writes = []
+        write_journal = dm._write_journal
+        dm._write_journal = lambda text: (writes.append(text), write_journal(text))
+
+        durable = []
+        item = {"code": "", "name": "ITEM", "price": 10.0, "qty": 1, "subtotal": 10.0, "category": "C"}
+        for i in range(5):
+            dm.add_transaction("sales", f"r{i}.pdf", [dict(item)], on_durable=durable.append)
+        self.assertTrue(dm.flush_writes(timeout=10))
+
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(writes[0].count("\n"), 5)
+        with open(main.LEDGER_JOURNAL_FILE) as f:
+            self.assertEqual(sum(1 for line in f if line.strip()), 5)
+
+        callbacks = []
+        while not dm.writer.completed.empty():
+            callbacks.append(dm.writer.completed.get_nowait())
+        self.assertEqual([error for callback, error in callbacks if callback], [None] * 5)
+
+
+if __name__ == "__main__":
+    unittest.main()